@@ -7,14 +7,644 @@ Usa Ghostscript para compressão real de 50%+ mantendo qualidade visual
 
 import os
 import sys
+import asyncio
+import faulthandler
 import json
+import hashlib
+import logging
 import shutil
 import subprocess
+import queue
+import signal
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice, product
+from logging.handlers import RotatingFileHandler
 from typing import Dict, List, Tuple
 import pikepdf
 
+try:
+    import fcntl  # Só existe em Linux/macOS
+except ImportError:
+    fcntl = None
+
+try:
+    import orjson  # Opcional: (de)serialização JSON bem mais rápida
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash  # Opcional: hash de caminhos mais rápido que o blake2b
+except ImportError:
+    xxhash = None
+
+try:
+    from tqdm import tqdm  # Opcional: barra de progresso no terminal
+except ImportError:
+    tqdm = None
+
+FICLONE = 0x40049409  # ioctl do Linux para reflink (cópia CoW em Btrfs/XFS)
+
+
+def _json_dumps(obj, indent: bool = False) -> bytes:
+    """Serializa para JSON em bytes UTF-8 (orjson quando disponível)"""
+    try:
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+    except (TypeError, UnicodeEncodeError):
+        # Nome de arquivo que não é UTF-8 válido (os.walk devolve surrogates): escapa como \udcXX,
+        # que o json da stdlib lê de volta para o mesmo str
+        return json.dumps(obj, indent=2 if indent else None, ensure_ascii=True).encode('ascii')
+
+
+def _json_loads(data):
+    """Desserializa JSON de bytes/str (orjson quando disponível)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # orjson recusa surrogates escapados (\udcXX): a stdlib aceita
+    return json.loads(data)
+
+
+def _path_key(path: str) -> int:
+    """Hash de 64 bits do caminho (bem menor na memória que a str completa)"""
+    data = path.encode('utf-8', 'surrogatepass')
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def _case_variants(extensions: List[str]) -> Tuple[str, ...]:
+    """Todas as combinações de maiúsculas/minúsculas (.pdf, .PDF, .Pdf...) para str.endswith"""
+    variants = set()
+    for ext in extensions:
+        variants.update("".join(chars) for chars in product(*({c.lower(), c.upper()} for c in ext)))
+    return tuple(sorted(variants))
+
+
+def _fast_copy(src, dst):
+    """
+    Copia arquivo pelo caminho mais rápido disponível e preserva metadados (como copy2)
+    Linux: reflink (FICLONE) -> copy_file_range (cópia no kernel) -> buffer de 1 MiB
+    Outros sistemas: shutil.copy2 (já usa a chamada nativa do SO)
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        shutil.copy2(src, dst)
+        return
+    
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        src_fd = fsrc.fileno()
+        dst_fd = fdst.fileno()
+        copied = False
+        
+        # 1. Reflink: instantâneo, sem copiar dados (mesmo volume CoW)
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            copied = True
+        except OSError:
+            pass
+        
+        # 2. copy_file_range: cópia dentro do kernel, sem buffer em userspace
+        if not copied and hasattr(os, "copy_file_range"):
+            try:
+                while os.copy_file_range(src_fd, dst_fd, 1 << 30) > 0:
+                    pass
+                copied = True
+            except OSError:
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+        
+        # 3. Fallback: leitura/escrita com buffer grande
+        if not copied:
+            shutil.copyfileobj(fsrc, fdst, 1 << 20)
+    
+    shutil.copystat(src, dst)
+
+
+@lru_cache(maxsize=None)
+def _gs_base_args(gs_path: str, dpi: int, profile: str = "thorough") -> Tuple[str, ...]:
+    """
+    Argumentos do Ghostscript comuns a todas as chamadas (sem entrada/saída)
+    profile: "thorough" = completo | "fast" = sem detecção de imagens duplicadas,
+    sem reembutir todas as fontes e sem linearização (bem menos CPU)
+    Montados uma vez por combinação (cache em cada processo worker).
+    """
+    fast = profile == "fast"
+    # Configuração AGRESSIVA do Ghostscript
+    # Essa é a ÚNICA forma de comprimir PDFs de verdade (50%+ de redução)
+    args = [
+        gs_path,
+        '-dSAFER',  # MODO SEGURO: Previne acesso ao sistema de arquivos
+        '-dNOPAUSE',
+        '-dQUIET',
+        '-dBATCH',
+        '-sDEVICE=pdfwrite',
+        '-dCompatibilityLevel=1.4',
+        '-dPDFSETTINGS=/screen' if fast else '-dPDFSETTINGS=/ebook',  # Resolução vem do DPI abaixo
+        f'-dColorImageResolution={dpi}',
+        f'-dGrayImageResolution={dpi}',
+        f'-dMonoImageResolution={dpi}',
+        '-dColorImageDownsampleType=/Bicubic',  # Melhor qualidade
+        '-dGrayImageDownsampleType=/Bicubic',
+        '-dDownsampleColorImages=true',
+        '-dDownsampleGrayImages=true',
+        '-dDownsampleMonoImages=true',
+        '-dColorImageDownsampleThreshold=1.0',  # Sempre reduzir imagens
+        '-dGrayImageDownsampleThreshold=1.0',
+        '-dAutoFilterColorImages=false',
+        '-dAutoFilterGrayImages=false',
+        '-dColorImageFilter=/DCTEncode',  # JPEG para cores
+        '-dGrayImageFilter=/DCTEncode',   # JPEG para cinza
+        '-dJPEGQ=85',  # Qualidade JPEG (85 = boa qualidade)
+        '-dCompressFonts=true',
+        '-dSubsetFonts=true',
+    ]
+    if not fast:
+        args += [
+            '-dDetectDuplicateImages=true',
+            '-dEmbedAllFonts=true',
+            '-dFastWebView=true',  # Otimiza para visualização
+        ]
+    return tuple(args)
+
+
+def _check_gs_output(input_path: Path, output_path: Path, original_size: int) -> Tuple[bool, str, int, int]:
+    """Valida a saída do Ghostscript e mantém o original se não houve ganho"""
+    if not output_path.exists():
+        _fast_copy(input_path, output_path)
+        return False, "GS não gerou arquivo de saída", original_size, original_size
+    
+    compressed_size = output_path.stat().st_size
+    
+    # Se o arquivo ficou MAIOR, usa o original
+    if compressed_size >= original_size:
+        _fast_copy(input_path, output_path)
+        return False, "PDF já otimizado", original_size, original_size
+    
+    compression_ratio = ((original_size - compressed_size) / original_size) * 100
+    
+    return True, f"Comprimido ({compression_ratio:.1f}% de redução)", original_size, compressed_size
+
+
+def _ps_string(path: Path) -> str:
+    """Converte caminho em string PostScript (barras normais + escapes)"""
+    text = path.as_posix()
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def _compress_pdf_ghostscript_stream(gs_path: str, input_path: Path, output_path: Path, dpi: int = 150, profile: str = "thorough") -> Tuple[bool, str, int, int]:
+    """
+    Comprime PDF via stdin/stdout do Ghostscript
+    O gs não abre arquivos (bom para compartilhamentos de rede): lemos a
+    entrada uma vez e a saída só é gravada se ficou menor que o original.
+    """
+    original_size = 0
+    try:
+        with open(input_path, 'rb') as f:
+            data = f.read()
+        original_size = len(data)
+        
+        # -sstdout=%stderr: mensagens do interpretador vão para o stderr e não se misturam aos bytes do PDF
+        cmd = [*_gs_base_args(gs_path, dpi, profile), '-sstdout=%stderr', '-sOutputFile=-', '-']
+        result = subprocess.run(
+            cmd,
+            input=data,
+            capture_output=True,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        )
+        compressed = result.stdout
+        
+        if result.returncode != 0 or not compressed.startswith(b'%PDF'):
+            # Se falhar, copia o original
+            _fast_copy(input_path, output_path)
+            return False, f"Erro GS: {result.stderr[:100].decode('utf-8', 'replace')}", original_size, original_size
+        
+        # Se o arquivo ficou MAIOR, usa o original (sem gravar a saída do gs)
+        if len(compressed) >= original_size:
+            _fast_copy(input_path, output_path)
+            return False, "PDF já otimizado", original_size, original_size
+        
+        with open(output_path, 'wb') as f:
+            f.write(compressed)
+        
+        compression_ratio = ((original_size - len(compressed)) / original_size) * 100
+        return True, f"Comprimido ({compression_ratio:.1f}% de redução)", original_size, len(compressed)
+        
+    except Exception as e:
+        try:
+            _fast_copy(input_path, output_path)
+        except:
+            pass
+        return False, f"Erro: {str(e)[:100]}", original_size, original_size
+
+
+def _compress_pdf_ghostscript(gs_path: str, input_path: Path, output_path: Path, dpi: int = 150,
+                              profile: str = "thorough", stream_io: bool = False,
+                              original_size: int = None) -> Tuple[bool, str, int, int]:
+    """
+    Comprime PDF usando Ghostscript (COMPRESSÃO REAL)
+    Função de módulo (picklable) para rodar nos workers do ProcessPoolExecutor
+    DPI: 72=screen (max), 150=ebook (alto), 300=printer (médio), 600=prepress (baixo)
+    original_size: tamanho já conhecido do scan (evita outro stat)
+    """
+    if stream_io:
+        return _compress_pdf_ghostscript_stream(gs_path, input_path, output_path, dpi, profile)
+    
+    try:
+        if original_size is None:
+            original_size = input_path.stat().st_size
+        
+        cmd = [
+            *_gs_base_args(gs_path, dpi, profile),
+            f'-sOutputFile={str(output_path)}',
+            str(input_path)
+        ]
+        
+        # Executa Ghostscript
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        )
+        
+        if result.returncode != 0:
+            # Se falhar, copia o original
+            _fast_copy(input_path, output_path)
+            return False, f"Erro GS: {result.stderr[:100]}", original_size, original_size
+        
+        return _check_gs_output(input_path, output_path, original_size)
+        
+    except Exception as e:
+        try:
+            _fast_copy(input_path, output_path)
+        except:
+            pass
+        return False, f"Erro: {str(e)[:100]}", original_size or 0, original_size or 0
+
+
+def _compress_pdf_batch(gs_path: str, inputs: List[Path], outputs: List[Path], dpi: int = 150,
+                        profile: str = "thorough", min_reduction: float = 15.0,
+                        stream_io: bool = False, sizes: List[int] = None) -> List[Tuple[bool, str, int, int]]:
+    """
+    Comprime um lote de PDFs no perfil pedido
+    No perfil "fast", PDFs com redução abaixo de min_reduction (%) são
+    refeitos no perfil "thorough" e fica o menor dos dois resultados.
+    """
+    if sizes is None:
+        sizes = [None] * len(inputs)
+    results = _compress_pdf_batch_pass(gs_path, inputs, outputs, dpi, profile, stream_io, sizes)
+    if profile != "fast":
+        return results
+    
+    retry = [
+        idx for idx, (success, message, original_size, compressed_size) in enumerate(results)
+        if not success or not original_size or (original_size - compressed_size) * 100 / original_size < min_reduction
+    ]
+    if not retry:
+        return results
+    
+    tmp_outputs = [outputs[i].with_name(outputs[i].name + ".thorough.tmp") for i in retry]
+    thorough_results = _compress_pdf_batch_pass(
+        gs_path, [inputs[i] for i in retry], tmp_outputs, dpi, "thorough", stream_io,
+        [sizes[i] for i in retry]
+    )
+    for idx, tmp_path, thorough_result in zip(retry, tmp_outputs, thorough_results):
+        try:
+            # Só compara tamanhos entre sucessos: uma falha do fast nunca "vence" o thorough
+            if thorough_result[0] and (not results[idx][0] or thorough_result[3] < results[idx][3]):
+                os.replace(tmp_path, outputs[idx])
+                results[idx] = thorough_result
+            elif tmp_path.exists():
+                os.remove(tmp_path)
+        except OSError:
+            pass
+    return results
+
+
+def _compress_pdf_batch_pass(gs_path: str, inputs: List[Path], outputs: List[Path], dpi: int = 150,
+                             profile: str = "thorough", stream_io: bool = False,
+                             sizes: List[int] = None) -> List[Tuple[bool, str, int, int]]:
+    """
+    Comprime vários PDFs com UMA única chamada ao Ghostscript
+    Evita pagar a inicialização do gs (fontes, ICC, interpretador) por arquivo.
+    Um driver PostScript troca o /OutputFile e roda cada PDF em sequência;
+    arquivos que falharem no lote são refeitos individualmente.
+    Com stream_io cada PDF passa pelo stdin/stdout de uma chamada própria.
+    """
+    if sizes is None:
+        sizes = [None] * len(inputs)
+    if len(inputs) == 1 or stream_io:
+        return [
+            _compress_pdf_ghostscript(gs_path, input_path, output_path, dpi, profile, stream_io, size)
+            for input_path, output_path, size in zip(inputs, outputs, sizes)
+        ]
+    
+    failed = set()
+    driver_path = None
+    try:
+        # Driver: para cada PDF, abre nova saída e executa o arquivo
+        # "stopped" isola erros de um PDF sem derrubar o lote inteiro
+        driver_lines = []
+        for idx, (input_path, output_path) in enumerate(zip(inputs, outputs)):
+            driver_lines.append(
+                f"<< /OutputFile {_ps_string(output_path)} >> setpagedevice\n"
+                f"{{ {_ps_string(input_path)} run }} stopped "
+                f"{{ (GSBATCH_FAIL {idx}\\n) print flush clear cleardictstack }} if\n"
+            )
+        
+        with tempfile.NamedTemporaryFile('w', suffix='.ps', delete=False, encoding='utf-8') as f:
+            f.writelines(driver_lines)
+            driver_path = f.name
+        
+        # -dSAFER: libera apenas as pastas de entrada (leitura) e saída (escrita)
+        read_dirs = {str(p.parent) for p in inputs}
+        write_dirs = {str(p.parent) for p in outputs}
+        cmd = list(_gs_base_args(gs_path, dpi, profile))
+        cmd += [f'--permit-file-read={os.path.join(d, "*")}' for d in sorted(read_dirs)]
+        cmd += [f'--permit-file-write={os.path.join(d, "*")}' for d in sorted(write_dirs)]
+        cmd += [f'-sOutputFile={str(outputs[0])}', driver_path]
+        
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        )
+        
+        if result.returncode != 0:
+            # Lote inteiro falhou: refaz tudo individualmente
+            failed = set(range(len(inputs)))
+        else:
+            for line in result.stdout.splitlines():
+                if line.startswith("GSBATCH_FAIL "):
+                    failed.add(int(line.split()[1]))
+    except Exception:
+        failed = set(range(len(inputs)))
+    finally:
+        if driver_path:
+            try:
+                os.remove(driver_path)
+            except OSError:
+                pass
+    
+    results = []
+    for idx, (input_path, output_path, size) in enumerate(zip(inputs, outputs, sizes)):
+        if idx in failed or not output_path.exists():
+            results.append(_compress_pdf_ghostscript(gs_path, input_path, output_path, dpi, profile, original_size=size))
+            continue
+        try:
+            results.append(_check_gs_output(input_path, output_path, size if size is not None else input_path.stat().st_size))
+        except Exception as e:
+            results.append((False, f"Erro: {str(e)[:100]}", 0, 0))
+    return results
+
+
+def _pdf_has_images(pdf: pikepdf.Pdf) -> bool:
+    """Verifica se o PDF tem alguma imagem (para no primeiro XObject /Image)"""
+    for obj in pdf.objects:
+        if isinstance(obj, pikepdf.Stream) and obj.get("/Subtype") == "/Image":
+            return True
+    return False
+
+
+def _compress_pdf_pikepdf(input_path: Path, output_path: Path, original_size: int = None) -> Tuple[bool, str, int, int, bool]:
+    """
+    Compressão estrutural rápida com pikepdf/qpdf (sem rasterizar nada)
+    Object streams + recompressão flate + remoção de objetos não usados.
+    Retorna: (sucesso, mensagem, tamanho_original, tamanho_comprimido, tem_imagens)
+    """
+    if original_size is None:
+        original_size = input_path.stat().st_size
+    with pikepdf.open(input_path) as pdf:
+        has_images = _pdf_has_images(pdf)
+        try:
+            pdf.remove_unreferenced_resources()
+        except:
+            pass
+        pdf.save(
+            output_path,
+            compress_streams=True,
+            object_stream_mode=pikepdf.ObjectStreamMode.generate,
+            linearize=False,
+            recompress_flate=True
+        )
+    
+    compressed_size = output_path.stat().st_size
+    if compressed_size >= original_size:
+        return False, "PDF já otimizado", original_size, original_size, has_images
+    
+    compression_ratio = ((original_size - compressed_size) / original_size) * 100
+    return True, f"Comprimido com pikepdf ({compression_ratio:.1f}% de redução)", original_size, compressed_size, has_images
+
+
+def _is_probably_compressed(input_path: Path, original_size: int, min_size: int) -> bool:
+    """
+    Pré-verificação barata (só cabeçalho e final do arquivo, sem abrir o PDF)
+    Pula PDFs pequenos, gerados por Ghostscript/iLovePDF ou já linearizados
+    com xref comprimida (object streams) - quase nunca diminuem.
+    """
+    if original_size < min_size:
+        return True
+    
+    with open(input_path, 'rb') as f:
+        head = f.read(1024)
+        f.seek(max(0, original_size - 65536))
+        tail = f.read()
+    
+    probe = (head + tail).lower()
+    if b"ghostscript" in probe or b"ilovepdf" in probe:
+        return True
+    return b"/linearized" in head.lower() and b"/xref" in tail.lower()
+
+
+def _prepare_chunk(inputs: List[Path], outputs: List[Path], settings: dict, sizes: List[int]) -> Tuple[list, List[int], dict]:
+    """
+    Etapa sem Ghostscript de um lote: descarta PDFs já otimizados e tenta pikepdf
+    Retorna: (resultados, índices que ainda precisam do gs, resultados pikepdf pendentes)
+    """
+    results = [None] * len(inputs)
+    
+    # Pré-verificação: evita chamar pikepdf/gs só para descobrir que não há ganho
+    todo = []
+    for idx, (input_path, output_path) in enumerate(zip(inputs, outputs)):
+        if settings.get("skip_precompressed", True):
+            try:
+                original_size = sizes[idx] if sizes[idx] is not None else input_path.stat().st_size
+                if _is_probably_compressed(input_path, original_size, settings.get("precheck_min_size_kb", 50) * 1024):
+                    _fast_copy(input_path, output_path)
+                    results[idx] = (False, "PDF já otimizado (pré-verificação)", original_size, original_size)
+                    continue
+            except OSError:
+                pass
+        todo.append(idx)
+    
+    if not settings.get("pikepdf_first", True):
+        return results, todo, {}
+    
+    fallback_ratio = settings.get("pikepdf_fallback_ratio", 0.9)
+    pikepdf_results = {}
+    gs_indexes = []
+    
+    for idx in todo:
+        input_path, output_path = inputs[idx], outputs[idx]
+        pike_tmp = output_path.with_name(output_path.name + ".pikepdf.tmp")
+        try:
+            success, message, original_size, compressed_size, has_images = _compress_pdf_pikepdf(input_path, pike_tmp, sizes[idx])
+        except Exception:
+            # pikepdf não abriu (corrompido, senha...): Ghostscript é mais tolerante
+            # Uma falha no meio do save deixa o temporário parcial: não pode ficar na saída
+            try:
+                pike_tmp.unlink(missing_ok=True)
+            except OSError:
+                pass
+            gs_indexes.append(idx)
+            continue
+        
+        if not has_images:
+            # Sem imagens o Ghostscript quase não ajuda: fica com o pikepdf
+            if success:
+                os.replace(pike_tmp, output_path)
+            else:
+                os.remove(pike_tmp)
+                _fast_copy(input_path, output_path)
+            results[idx] = (success, message, original_size, compressed_size)
+        elif success and compressed_size / original_size <= fallback_ratio:
+            os.replace(pike_tmp, output_path)
+            results[idx] = (success, message, original_size, compressed_size)
+        else:
+            if success:
+                pikepdf_results[idx] = (pike_tmp, (success, message, original_size, compressed_size))
+            else:
+                os.remove(pike_tmp)
+            gs_indexes.append(idx)
+    
+    return results, gs_indexes, pikepdf_results
+
+
+def _merge_gs_results(results: list, outputs: List[Path], gs_indexes: List[int], gs_results: list, pikepdf_results: dict):
+    """Junta os resultados do Ghostscript, ficando com o menor entre pikepdf e gs"""
+    for idx, gs_result in zip(gs_indexes, gs_results):
+        results[idx] = gs_result
+        if idx in pikepdf_results:
+            pike_tmp, pike_result = pikepdf_results[idx]
+            if pike_result[3] < gs_result[3] or not gs_result[0]:
+                os.replace(pike_tmp, outputs[idx])
+                results[idx] = pike_result
+            else:
+                os.remove(pike_tmp)
+
+
+def _isolate_pool_worker():
+    """Initializer dos workers: Ctrl+C fica só com o processo principal, que decide a parada
+    (sem isso o gs morria no Ctrl+C e cada lote virava retentativas arquivo por arquivo)"""
+    if sys.platform == "win32":
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    else:
+        # Grupo de processos próprio: o Ctrl+C do terminal não chega ao worker nem ao gs,
+        # e _kill_pool_workers derruba os dois de uma vez
+        os.setpgrp()
+
+
+def _kill_pool_workers(executor: ProcessPoolExecutor):
+    """Encerra na hora os workers (e o gs de cada um): os lotes em andamento seriam descartados"""
+    for process in list((executor._processes or {}).values()):
+        try:
+            if sys.platform == "win32":
+                # /T derruba a árvore inteira (worker + gs)
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                               capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW)
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _compress_pdf_chunk(gs_path: str, inputs: List[Path], outputs: List[Path], dpi: int, settings: dict,
+                        sizes: List[int] = None) -> List[Tuple[bool, str, int, int]]:
+    """
+    Worker de um lote: descarta PDFs já otimizados, tenta pikepdf e só chama
+    o Ghostscript para PDFs com imagens cujo ganho estrutural ficou abaixo do limite
+    sizes: tamanhos vindos do scan (None = desconhecido, faz stat)
+    """
+    if sizes is None:
+        sizes = [None] * len(inputs)
+    results, gs_indexes, pikepdf_results = _prepare_chunk(inputs, outputs, settings, sizes)
+    
+    if gs_indexes:
+        gs_results = _compress_pdf_batch(
+            gs_path, [inputs[i] for i in gs_indexes], [outputs[i] for i in gs_indexes], dpi,
+            settings.get("gs_profile", "fast"), settings.get("fast_min_reduction", 15.0),
+            settings.get("stream_io", False), [sizes[i] for i in gs_indexes]
+        )
+        _merge_gs_results(results, outputs, gs_indexes, gs_results, pikepdf_results)
+    
+    return results
+
+
+async def _run_gs_async(gs_path: str, input_path: Path, output_path: Path, dpi: int, profile: str,
+                        original_size: int = None) -> Tuple[bool, str, int, int]:
+    """Uma chamada do Ghostscript como subprocesso assíncrono (sem bloquear o loop)"""
+    if original_size is None:
+        original_size = await asyncio.to_thread(os.path.getsize, input_path)
+    cmd = [*_gs_base_args(gs_path, dpi, profile), f'-sOutputFile={str(output_path)}', str(input_path)]
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        )
+        _, stderr = await proc.communicate()
+    except OSError as e:
+        await asyncio.to_thread(_fast_copy, input_path, output_path)
+        return False, f"Erro: {str(e)[:100]}", original_size, original_size
+    
+    if proc.returncode != 0:
+        # Se falhar, copia o original
+        await asyncio.to_thread(_fast_copy, input_path, output_path)
+        return False, f"Erro GS: {stderr[:100].decode('utf-8', 'replace')}", original_size, original_size
+    
+    return await asyncio.to_thread(_check_gs_output, input_path, output_path, original_size)
+
+
+async def _compress_pdf_async(gs_path: str, input_path: Path, output_path: Path, dpi: int, settings: dict,
+                             original_size: int = None) -> Tuple[bool, str, int, int]:
+    """
+    Versão assíncrona de um PDF (executor "asyncio"): pikepdf numa thread,
+    Ghostscript como subprocesso; refaz no perfil "thorough" se o "fast" render pouco
+    """
+    results, gs_indexes, pikepdf_results = await asyncio.to_thread(_prepare_chunk, [input_path], [output_path], settings, [original_size])
+    if not gs_indexes:
+        return results[0]
+    
+    profile = settings.get("gs_profile", "fast")
+    gs_result = await _run_gs_async(gs_path, input_path, output_path, dpi, profile, original_size)
+    original_size, compressed_size = gs_result[2], gs_result[3]
+    if profile == "fast" and (not original_size or (original_size - compressed_size) * 100 / original_size < settings.get("fast_min_reduction", 15.0)):
+        tmp_path = output_path.with_name(output_path.name + ".thorough.tmp")
+        thorough_result = await _run_gs_async(gs_path, input_path, tmp_path, dpi, "thorough", original_size)
+        try:
+            if thorough_result[0] and thorough_result[3] < gs_result[3]:
+                os.replace(tmp_path, output_path)
+                gs_result = thorough_result
+            elif tmp_path.exists():
+                os.remove(tmp_path)
+        except OSError:
+            pass
+    
+    _merge_gs_results(results, [output_path], gs_indexes, [gs_result], pikepdf_results)
+    return results[0]
+
 
 class AggressivePDFCompressor:
     """Compressor agressivo usando Ghostscript"""
@@ -23,10 +653,21 @@ class AggressivePDFCompressor:
         """Inicializa o compressor"""
         self.config = self._load_config(config_path)
         self.log_file_path = self.config["log_file"]
-        self.checkpoint_file = "checkpoint_ghostscript.json"  # Arquivo de checkpoint
+        self.checkpoint_file = "checkpoint_ghostscript.json"  # Estado do checkpoint (contadores)
+        self.checkpoint_log_file = "checkpoint_ghostscript.jsonl"  # Arquivos processados (append-only)
+        self._checkpoint_log = None
+        self._progress_logger = self._create_progress_logger()  # Uma linha JSON por PDF (rotativo)
+        self._out_buffer = []  # Linhas de saída pendentes (descarregadas a cada 0.5s)
+        self._out_last_flush = 0.0
+        self._progress_bar = None  # Barra tqdm (substitui as linhas por PDF no terminal)
+        self._done_count = 0  # PDFs concluídos nesta execução
+        self._stop = False  # Ligado por Ctrl+C/SIGTERM: os loops encerram no próximo ponto seguro
+        self._pdf_suffixes = _case_variants(
+            self.config.get("processing", {}).get("allowed_extensions", [".pdf"])
+        )  # Tupla pronta: endswith testa todas em C, sem loop Python
         self.gs_path = self._find_ghostscript()
         self.start_time = None
-        self.processed_files_set = set()  # Arquivos já processados
+        self.processed_files_set = set()  # Hashes (_path_key) dos arquivos já processados
         
         # Rastreamento de sessão
         self.session_info = {
@@ -109,13 +750,22 @@ class AggressivePDFCompressor:
             sys.exit(1)
     
     def _load_checkpoint(self) -> bool:
-        """Carrega checkpoint se existir"""
+        """Carrega checkpoint se existir (estado + lista append-only de processados)"""
         try:
             if os.path.exists(self.checkpoint_file):
-                with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
-                    checkpoint = json.load(f)
+                with open(self.checkpoint_file, 'rb') as f:
+                    checkpoint = _json_loads(f.read())
+                
+                # Checkpoints antigos guardavam a lista completa no próprio JSON
+                self.processed_files_set = {_path_key(path) for path in checkpoint.get("processed_files", [])}
+                if os.path.exists(self.checkpoint_log_file):
+                    with open(self.checkpoint_log_file, 'rb') as f:
+                        for line in f:
+                            try:
+                                self.processed_files_set.add(_path_key(_json_loads(line)["f"]))
+                            except (ValueError, KeyError):
+                                pass  # Última linha pode estar truncada após crash
                 
-                self.processed_files_set = set(checkpoint.get("processed_files", []))
                 self.stats["total_compressed"] = checkpoint.get("total_compressed", 0)
                 self.stats["total_errors"] = checkpoint.get("total_errors", 0)
                 self.stats["total_original_bytes"] = checkpoint.get("total_original_bytes", 0)
@@ -142,12 +792,66 @@ class AggressivePDFCompressor:
             print(f"⚠️  Erro ao carregar checkpoint: {e}")
         return False
     
+    def _open_checkpoint_log(self):
+        """Abre a lista de processados em modo append (uma linha JSON por arquivo)"""
+        try:
+            self._checkpoint_log = open(self.checkpoint_log_file, 'ab', buffering=1 << 16)
+        except Exception as e:
+            print(f"⚠️  Erro ao abrir checkpoint: {e}")
+    
+    def _close_checkpoint_log(self):
+        """Fecha (e descarrega) a lista de processados"""
+        if self._checkpoint_log:
+            try:
+                self._checkpoint_log.close()
+            except Exception:
+                pass
+            self._checkpoint_log = None
+    
+    def _create_progress_logger(self) -> logging.Logger:
+        """Log por arquivo em JSON Lines com rotação por tamanho (sem reescrever nada)"""
+        logger = logging.getLogger("gs_compress")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            handler = RotatingFileHandler(
+                os.path.splitext(self.log_file_path)[0] + ".jsonl",
+                maxBytes=self.config.get("progress_log_max_mb", 10) * 1024 * 1024,
+                backupCount=3,
+                encoding='utf-8',
+                delay=True
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        return logger
+    
+    def _log_processed(self, file_path: str, success: bool, original_size: int, compressed_size: int, message: str = ""):
+        """Registra um arquivo processado: linha no checkpoint + linha no log rotativo"""
+        try:
+            if self._checkpoint_log:
+                self._checkpoint_log.write(_json_dumps({"f": file_path, "o": original_size, "c": compressed_size}) + b"\n")
+            self._progress_logger.info(_json_dumps({
+                "file": file_path,
+                "timestamp": datetime.now().isoformat(),
+                "status": "compressed" if success else "not_compressed",
+                "original_size": original_size,
+                "compressed_size": compressed_size,
+                "message": message
+            }).decode('utf-8'))
+        except Exception as e:
+            # Não interrompe a execução, mas avisa: sem a linha no checkpoint o arquivo é refeito ao retomar
+            self._emit_error(f"   ⚠️  Falha ao registrar no checkpoint/log: {e}")
+    
     def _save_checkpoint(self):
-        """Salva checkpoint para retomar depois"""
+        """Salva estado do checkpoint (tamanho fixo) e descarrega a lista append-only"""
         try:
+            if self._checkpoint_log:
+                self._checkpoint_log.flush()
             checkpoint = {
                 "timestamp": datetime.now().isoformat(),
-                "processed_files": list(self.processed_files_set),
+                "first_start": self.session_info["first_start"],
+                "resume_count": self.session_info["resume_count"],
+                "copy_phase_start": self.session_info["copy_phase_start"],
                 "total_compressed": self.stats["total_compressed"],
                 "total_errors": self.stats["total_errors"],
                 "total_original_bytes": self.stats["total_original_bytes"],
@@ -155,8 +859,8 @@ class AggressivePDFCompressor:
                 "space_saved_bytes": self.stats["space_saved_bytes"],
                 "compression_ranges": self.stats["compression_ranges"]
             }
-            with open(self.checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(checkpoint, f, indent=2, ensure_ascii=False)
+            with open(self.checkpoint_file, 'wb') as f:
+                f.write(_json_dumps(checkpoint, indent=True))
         except Exception as e:
             pass  # Não interrompe se falhar
     
@@ -176,115 +880,101 @@ class AggressivePDFCompressor:
             size_bytes /= 1024.0
         return f"{size_bytes:.2f} PB"
     
-    def _compress_pdf_ghostscript(self, input_path: Path, output_path: Path, dpi: int = 150) -> Tuple[bool, str, int, int]:
+    def _scan_subtree(self, top_dir: str) -> Tuple[List[Tuple[str, int]], List[str]]:
         """
-        Comprime PDF usando Ghostscript (COMPRESSÃO REAL)
-        DPI: 72=screen (max), 150=ebook (alto), 300=printer (médio), 600=prepress (baixo)
+        Escaneia uma subárvore com os.scandir (roda em thread do pool de scan)
+        Tipo do arquivo vem do readdir, sem lstat extra; retorna caminhos como str.
+        PDFs vêm com o tamanho (DirEntry.stat, gratuito no Windows) para os workers.
         """
-        try:
-            original_size = input_path.stat().st_size
-            
-            # Configuração AGRESSIVA do Ghostscript
-            # Essa é a ÚNICA forma de comprimir PDFs de verdade (50%+ de redução)
-            cmd = [
-                self.gs_path,
-                '-dSAFER',  # MODO SEGURO: Previne acesso ao sistema de arquivos
-                '-dNOPAUSE',
-                '-dQUIET',
-                '-dBATCH',
-                '-sDEVICE=pdfwrite',
-                '-dCompatibilityLevel=1.4',
-                f'-dPDFSETTINGS=/ebook',  # Qualidade alta mas compacta
-                f'-dColorImageResolution={dpi}',
-                f'-dGrayImageResolution={dpi}',
-                f'-dMonoImageResolution={dpi}',
-                '-dColorImageDownsampleType=/Bicubic',  # Melhor qualidade
-                '-dGrayImageDownsampleType=/Bicubic',
-                '-dDownsampleColorImages=true',
-                '-dDownsampleGrayImages=true',
-                '-dDownsampleMonoImages=true',
-                '-dColorImageDownsampleThreshold=1.0',  # Sempre reduzir imagens
-                '-dGrayImageDownsampleThreshold=1.0',
-                '-dAutoFilterColorImages=false',
-                '-dAutoFilterGrayImages=false',
-                '-dColorImageFilter=/DCTEncode',  # JPEG para cores
-                '-dGrayImageFilter=/DCTEncode',   # JPEG para cinza
-                '-dJPEGQ=85',  # Qualidade JPEG (85 = boa qualidade)
-                '-dDetectDuplicateImages=true',
-                '-dCompressFonts=true',
-                '-dSubsetFonts=true',
-                '-dEmbedAllFonts=true',
-                '-dFastWebView=true',  # Otimiza para visualização
-                f'-sOutputFile={str(output_path)}',
-                str(input_path)
-            ]
-            
-            # Executa Ghostscript
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-            )
-            
-            if result.returncode != 0:
-                # Se falhar, copia o original
-                shutil.copy2(input_path, output_path)
-                return False, f"Erro GS: {result.stderr[:100]}", original_size, original_size
-            
-            if not output_path.exists():
-                shutil.copy2(input_path, output_path)
-                return False, "GS não gerou arquivo de saída", original_size, original_size
-            
-            compressed_size = output_path.stat().st_size
-            
-            # Se o arquivo ficou MAIOR, usa o original
-            if compressed_size >= original_size:
-                shutil.copy2(input_path, output_path)
-                return False, "PDF já otimizado", original_size, original_size
-            
-            compression_ratio = ((original_size - compressed_size) / original_size) * 100
-            
-            return True, f"Comprimido ({compression_ratio:.1f}% de redução)", original_size, compressed_size
-            
-        except Exception as e:
+        pdfs = []
+        other_files = []
+        pdfs_append = pdfs.append
+        others_append = other_files.append
+        compress_folder_name = self.config["compress_folder_name"]
+        pdf_suffixes = self._pdf_suffixes
+        unreported = 0
+        
+        # Busca em largura com pilha explícita
+        pending = deque([top_dir])
+        while pending:
+            current_dir = pending.popleft()
             try:
-                shutil.copy2(input_path, output_path)
-            except:
-                pass
-            return False, f"Erro: {str(e)[:100]}", input_path.stat().st_size if input_path.exists() else 0, 0
+                with os.scandir(current_dir) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if name != compress_folder_name:
+                                pending.append(entry.path)
+                            continue
+                        
+                        if name.endswith(pdf_suffixes):
+                            pdfs_append((entry.path, self._entry_size(entry)))
+                        else:
+                            others_append(entry.path)
+                        
+                        # Progresso compartilhado: trava só a cada 1000 arquivos
+                        unreported += 1
+                        if unreported == 1000:
+                            self._report_scan_progress(unreported)
+                            unreported = 0
+            except OSError as e:
+                print(f"\n   ⚠️  Erro ao ler pasta {current_dir}: {e}")
+        
+        self._report_scan_progress(unreported)
+        return pdfs, other_files
+    
+    def _entry_size(self, entry: os.DirEntry):
+        """Tamanho do arquivo pelo DirEntry (None se não der: o worker faz o stat)"""
+        try:
+            return entry.stat().st_size
+        except OSError:
+            return None
+    
+    def _report_scan_progress(self, count: int):
+        """Soma arquivos escaneados ao contador global e mostra progresso"""
+        with self._scan_lock:
+            previous = self._scan_total
+            self._scan_total += count
+            if self._scan_total // 1000 != previous // 1000:
+                print(f"\r   🔍 Escaneando... {self._scan_total:,} arquivos", end="", flush=True)
     
-    def _find_all_files(self, root_path: str) -> tuple[List[Path], List[Path]]:
-        """Encontra todos os arquivos (PDFs e não-PDFs) rapidamente"""
+    def _find_all_files(self, root_path: str) -> Tuple[List[Tuple[str, int]], List[str]]:
+        """
+        Encontra todos os arquivos (PDFs e não-PDFs) rapidamente
+        Cada subpasta do primeiro nível é escaneada em uma thread (os.scandir
+        libera o GIL durante a syscall) - ganho grande em SMB/NFS.
+        """
         print("   🔍 Escaneando arquivos...", end="", flush=True)
         
         pdfs = []
         other_files = []
-        root = Path(root_path)
+        root = str(Path(root_path))  # str normalizado pelo Path
         compress_folder_name = self.config["compress_folder_name"]
-        pdf_extensions = [".pdf", ".PDF"]
+        self._scan_lock = threading.Lock()
+        self._scan_total = 0
         
-        count_pdfs = 0
-        count_others = 0
+        # Primeiro nível: arquivos vão direto, subpastas viram tarefas
+        subdirs = []
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != compress_folder_name:
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith(self._pdf_suffixes):
+                        pdfs.append((entry.path, self._entry_size(entry)))
+                    else:
+                        other_files.append(entry.path)
+        except OSError as e:
+            print(f"\n   ⚠️  Erro ao ler pasta {root}: {e}")
         
-        for dirpath, dirnames, filenames in os.walk(root):
-            dirnames[:] = [d for d in dirnames if d != compress_folder_name]
-            
-            for filename in filenames:
-                file_path = Path(dirpath) / filename
-                
-                if any(filename.endswith(ext) for ext in pdf_extensions):
-                    pdfs.append(file_path)
-                    count_pdfs += 1
-                    if count_pdfs % 1000 == 0:
-                        print(f"\r   🔍 Escaneando... {count_pdfs:,} PDFs, {count_others:,} outros", end="", flush=True)
-                else:
-                    other_files.append(file_path)
-                    count_others += 1
-                    if count_others % 1000 == 0:
-                        print(f"\r   🔍 Escaneando... {count_pdfs:,} PDFs, {count_others:,} outros", end="", flush=True)
+        scan_workers = self.config.get("scan_workers") or min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=scan_workers) as executor:
+            for sub_pdfs, sub_others in executor.map(self._scan_subtree, subdirs):
+                pdfs.extend(sub_pdfs)
+                other_files.extend(sub_others)
         
-        print(f"\r   ✅ Encontrados {count_pdfs:,} PDFs e {count_others:,} outros arquivos!          ")
+        print(f"\r   ✅ Encontrados {len(pdfs):,} PDFs e {len(other_files):,} outros arquivos!          ")
         return pdfs, other_files
     
     def _create_compress_folder(self, root_path: str) -> Path:
@@ -299,23 +989,162 @@ class AggressivePDFCompressor:
         compress_folder.mkdir(parents=True, exist_ok=True)
         return compress_folder
     
-    def _copy_other_file(self, file_path: Path, root_path: Path, compress_folder: Path) -> bool:
-        """Copia arquivo não-PDF mantendo estrutura de pastas"""
+    def _output_paths(self, files: List[str], root_path: str, compress_folder: Path) -> List[str]:
+        """
+        Calcula os destinos (mesma estrutura de pastas) e cria cada pasta uma única vez
+        Os caminhos do scan começam com a raiz: o relativo sai por fatiamento de str.
+        """
+        root_prefix_len = len(os.path.join(str(Path(root_path)), ""))
+        compress_str = str(compress_folder)
+        outputs = [os.path.join(compress_str, file_str[root_prefix_len:]) for file_str in files]
+        
+        for parent in sorted({os.path.dirname(output_str) for output_str in outputs}):
+            os.makedirs(parent, exist_ok=True)
+        return outputs
+    
+    def _copy_other_file(self, file_path: str, output_path: str) -> bool:
+        """Copia arquivo não-PDF para o destino (pasta já criada)"""
         try:
-            # Calcula caminho relativo e de destino
-            relative_path = file_path.relative_to(root_path)
-            output_path = compress_folder / relative_path
-            
-            # Cria diretórios necessários
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
             # Copia arquivo preservando metadados
-            shutil.copy2(file_path, output_path)
+            _fast_copy(file_path, output_path)
             return True
         except Exception as e:
-            print(f"   ⚠️  Erro ao copiar {file_path.name}: {e}")
+            print(f"   ⚠️  Erro ao copiar {os.path.basename(file_path)}: {e}")
             return False
     
+    def _prefetch_batches(self, batches: List[list], scratch_folder: Path, depth: int, prefix: str = ""):
+        """
+        Copia os PDFs dos próximos lotes para disco local em uma thread separada
+        Enquanto o Ghostscript trabalha, a leitura do próximo lote já acontece.
+        Gera (lote, caminhos_locais); a fila limita quantos lotes ficam à frente.
+        """
+        staged = queue.Queue(maxsize=max(1, depth))
+        
+        def stage():
+            for batch_idx, batch in enumerate(batches):
+                local_inputs = []
+                for file_idx, (pdf_path, _, _) in enumerate(batch):
+                    local_path = scratch_folder / f"{prefix}{batch_idx}_{file_idx}_{pdf_path.name}"
+                    try:
+                        _fast_copy(pdf_path, local_path)
+                        local_inputs.append(local_path)
+                    except OSError:
+                        local_inputs.append(pdf_path)  # Lê direto da origem
+                staged.put((batch, local_inputs))
+            staged.put(None)
+        
+        threading.Thread(target=stage, daemon=True).start()
+        while True:
+            item = staged.get()
+            if item is None:
+                return
+            yield item
+    
+    def _emit(self, text: str):
+        """Acumula uma linha de saída; descarrega no máximo a cada 0.5s"""
+        if self._progress_bar is not None:
+            return  # No terminal a barra de progresso já mostra o andamento
+        self._out_buffer.append(text)
+        if time.monotonic() - self._out_last_flush >= 0.5:
+            self._flush_output()
+    
+    def _emit_error(self, text: str):
+        """Falhas aparecem mesmo com a barra ativa (tqdm.write escreve acima dela)"""
+        if self._progress_bar is not None:
+            tqdm.write(text)
+        else:
+            self._emit(text)
+    
+    def _flush_output(self):
+        """Escreve de uma vez as linhas acumuladas"""
+        if self._out_buffer:
+            sys.stdout.write("\n".join(self._out_buffer) + "\n")
+            sys.stdout.flush()
+            self._out_buffer.clear()
+        self._out_last_flush = time.monotonic()
+    
+    def _record_result(self, success: bool, message: str, original_size: int, compressed_size: int):
+        """Atualiza estatísticas com o resultado de um PDF (roda no processo principal)"""
+        if success:
+            compression_ratio = ((original_size - compressed_size) / original_size) * 100
+            
+            if compression_ratio >= 50:
+                self.stats["compression_ranges"]["excellent"] += 1
+            elif compression_ratio >= 30:
+                self.stats["compression_ranges"]["good"] += 1
+            elif compression_ratio >= 15:
+                self.stats["compression_ranges"]["moderate"] += 1
+            else:
+                self.stats["compression_ranges"]["low"] += 1
+            
+            self.stats["total_compressed"] += 1
+            self.stats["total_original_bytes"] += original_size
+            self.stats["total_final_bytes"] += compressed_size
+            self.stats["space_saved_bytes"] += (original_size - compressed_size)
+            
+            self._emit(f"   ✅ {message}")
+            self._emit(f"   📦 {self._format_size(original_size)} → {self._format_size(compressed_size)}\n")
+        else:
+            self.stats["total_errors"] += 1
+            self._emit(f"   ⚠️  {message}\n")
+    
+    def _handle_result(self, pdf_path: Path, result: Tuple[bool, str, int, int], total: int, checkpoint_interval: int):
+        """Registra o resultado de um PDF concluído (estatísticas, checkpoint, progresso)"""
+        success, message, original_size, compressed_size = result
+        self._done_count += 1
+        self._emit(f"[{self._done_count}/{total}] {pdf_path.name}")
+        self._record_result(success, message, original_size, compressed_size)
+        if self._progress_bar is not None:
+            if not success and not message.startswith("PDF já otimizado"):
+                self._emit_error(f"⚠️  {pdf_path.name}: {message.rstrip()}")
+            self._progress_bar.update(1)
+            self._progress_bar.set_postfix_str(
+                f"economizado {self._format_size(self.stats['space_saved_bytes'])}", refresh=False
+            )
+        
+        # Adiciona aos processados
+        self.processed_files_set.add(_path_key(str(pdf_path)))
+        self._log_processed(str(pdf_path), success, original_size, compressed_size, message)
+        
+        # Salva checkpoint a cada N arquivos concluídos (resumo só no fim/Ctrl+C)
+        if self._done_count % checkpoint_interval == 0:
+            self._save_checkpoint()
+    
+    async def _process_pdfs_async(self, tasks: List[Tuple[Path, Path, int]], dpi: int, settings: dict,
+                                  workers: int, total: int, checkpoint_interval: int):
+        """
+        Executor "asyncio": um único processo Python dirige até N Ghostscript
+        Cada corrotina puxa o próximo PDF da fila compartilhada (no máximo N em voo),
+        então não há pickling nem um interpretador Python por worker.
+        """
+        pending_tasks = iter(tasks)
+        
+        async def worker():
+            for pdf_path, output_path, size in pending_tasks:
+                try:
+                    result = await _compress_pdf_async(self.gs_path, pdf_path, output_path, dpi, settings, size)
+                except Exception as e:
+                    result = (False, f"Erro: {str(e)[:100]}", 0, 0)
+                if self._stop:
+                    return  # Interrompido: o gs pode ter morrido junto, não registra
+                self._handle_result(pdf_path, result, total, checkpoint_interval)
+        
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    
+    def _request_stop(self, signum, frame):
+        """Handler de SIGINT/SIGTERM: só marca a parada (o loop salva e encerra)"""
+        self._stop = True
+        # Um segundo Ctrl+C/SIGTERM força a saída se o encerramento limpo travar
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    
+    def _close_progress(self):
+        """Fecha a barra de progresso e descarrega a saída pendente"""
+        if self._progress_bar is not None:
+            self._progress_bar.close()
+            self._progress_bar = None
+        self._flush_output()
+    
     def process_all_pdfs(self):
         """Processa todos os PDFs com compressão agressiva"""
         self.start_time = datetime.now()
@@ -346,12 +1175,17 @@ class AggressivePDFCompressor:
         
         # Filtra PDFs já processados
         if has_checkpoint:
-            pdfs_to_process = [pdf for pdf in pdfs if str(pdf) not in self.processed_files_set]
+            processed = self.processed_files_set
+            pdfs_to_process = [pdf for pdf in pdfs if _path_key(pdf[0]) not in processed]
             skipped = len(pdfs) - len(pdfs_to_process)
             print(f"\n⏩ Pulando {skipped:,} arquivos já processados")
             print(f"🔄 Restam {len(pdfs_to_process):,} arquivos para processar\n")
             pdfs = pdfs_to_process
         
+        # Ctrl+C/SIGTERM viram uma flag: sem KeyboardInterrupt no meio de uma escrita
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        
         # Cria pasta de saída sempre (mesmo se não tiver PDFs para processar)
         compress_folder = self._create_compress_folder(root_path)
         
@@ -363,70 +1197,150 @@ class AggressivePDFCompressor:
             
             # Obtém configuração de DPI
             dpi = self.config.get("compression_settings", {}).get("dpi", 150)
-            print(f"⚙️  DPI: {dpi} (72=max compressão, 150=boa, 300=alta qualidade)\n")
+            print(f"⚙️  DPI: {dpi} (72=max compressão, 150=boa, 300=alta qualidade)")
+            
+            # Workers paralelos (0/null = todos os núcleos)
+            workers = self.config.get("workers") or os.cpu_count() or 1
+            checkpoint_interval = self.config.get("checkpoint_interval", 10)
+            batch_size = max(1, self.config.get("batch_size", 32))
+            print(f"⚙️  Workers: {workers} processos Ghostscript em paralelo")
+            print(f"⚙️  Lote: até {batch_size} PDFs por chamada do Ghostscript")
+            print(f"⚙️  Perfil Ghostscript: {self.config.get('gs_profile', 'fast')}\n")
             
-            # Processa cada PDF
+            # Monta lista de tarefas (entrada, saída)
+            outputs = self._output_paths([pdf_str for pdf_str, _ in pdfs], root_path, compress_folder)
+            tasks = [(Path(pdf_str), Path(output_str), size) for (pdf_str, size), output_str in zip(pdfs, outputs)]
+            
+            # pikepdf primeiro; Ghostscript só quando o ganho estrutural não basta
+            chunk_settings = {
+                "pikepdf_first": self.config.get("pikepdf_first", True),
+                "pikepdf_fallback_ratio": self.config.get("pikepdf_fallback_ratio", 0.9),
+                "gs_profile": self.config.get("gs_profile", "fast"),
+                "fast_min_reduction": self.config.get("fast_min_reduction", 15.0),
+                "stream_io": self.config.get("stream_io", False),
+                "skip_precompressed": self.config.get("skip_precompressed", True),
+                "precheck_min_size_kb": self.config.get("precheck_min_size_kb", 50)
+            }
+            
+            # Maiores primeiro (LPT): os PDFs gigantes não ficam para o final
+            tasks.sort(key=lambda task: task[2] or 0, reverse=True)
+            
+            # Faixas de tamanho: pequenos em lotes, médios e grandes um por chamada
+            small_max = self.config.get("small_pdf_max_mb", 2) * 1024 * 1024
+            huge_min = self.config.get("huge_pdf_min_mb", 100) * 1024 * 1024
+            huge_tasks = [task for task in tasks if (task[2] or 0) >= huge_min]
+            medium_tasks = [task for task in tasks if small_max <= (task[2] or 0) < huge_min]
+            small_tasks = [task for task in tasks if (task[2] or 0) < small_max]
+            
+            # Divide em lotes, sem deixar workers ociosos quando há poucos PDFs
+            batch_size = min(batch_size, max(1, -(-len(small_tasks) // workers)))
+            size_buckets = [
+                ("huge", [[task] for task in huge_tasks], self.config.get("huge_workers", 1)),
+                ("medium", [[task] for task in medium_tasks], self.config.get("medium_workers") or max(1, workers // 2)),
+                ("small", [small_tasks[i:i + batch_size] for i in range(0, len(small_tasks), batch_size)], workers * 2),
+            ]
+            print(f"⚙️  Tamanhos: {len(small_tasks):,} pequenos (em lotes), {len(medium_tasks):,} médios, {len(huge_tasks):,} grandes\n")
+            
+            # Processa lotes em paralelo
             print(f"{'='*60}")
             print(f"🚀 PROCESSANDO {len(pdfs):,} PDFs COM GHOSTSCRIPT")
             print(f"{'='*60}\n")
             
-            for idx, pdf_path in enumerate(pdfs, 1):
-                try:
-                    # Calcula caminho de saída
-                    relative_path = pdf_path.relative_to(Path(root_path))
-                    output_path = compress_folder / relative_path
-                    output_path.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    print(f"[{idx}/{len(pdfs)}] {pdf_path.name}")
+            use_asyncio = self.config.get("executor", "process") == "asyncio"
+            
+            # Opcional: pré-carrega os próximos lotes em disco local (NAS/rede lentos)
+            scratch_folder = None
+            if use_asyncio:
+                print(f"⚙️  Executor asyncio: até {workers} Ghostscript simultâneos em um único processo\n")
+            elif self.config.get("prefetch_to_scratch", False):
+                scratch_folder = Path(tempfile.mkdtemp(prefix="compress_pdf_", dir=self.config.get("scratch_dir") or None))
+                print(f"⚙️  Pré-carregando lotes em: {scratch_folder}\n")
+            
+            # Cada faixa tem sua fila e seu limite de lotes em voo (grandes: poucos por vez, sem estourar RAM)
+            buckets = []
+            for name, batches, limit in size_buckets:
+                if scratch_folder:
+                    staged_batches = self._prefetch_batches(batches, scratch_folder, self.config.get("prefetch_depth", 4), f"{name}_")
+                else:
+                    staged_batches = ((batch, [pdf_path for pdf_path, _, _ in batch]) for batch in batches)
+                buckets.append({"batches": staged_batches, "limit": limit, "in_flight": 0})
+            
+            # Terminal interativo: uma barra em vez de 3 linhas por PDF
+            if tqdm is not None and self.config.get("progress_bar", True) and sys.stdout.isatty():
+                self._progress_bar = tqdm(total=len(pdfs), unit="pdf", dynamic_ncols=True)
+            
+            self._open_checkpoint_log()
+            self._done_count = 0
+            executor = None
+            try:
+                if use_asyncio:
+                    asyncio.run(self._process_pdfs_async(tasks, dpi, chunk_settings, workers, len(pdfs), checkpoint_interval))
+                else:
+                    executor = ProcessPoolExecutor(max_workers=workers, initializer=_isolate_pool_worker)
                     
-                    # Comprime com Ghostscript
-                    success, message, original_size, compressed_size = self._compress_pdf_ghostscript(
-                        pdf_path, output_path, dpi
-                    )
+                    # Um só pool; o limite de cada faixa controla quantos lotes dela ficam em voo
+                    pending = {}
                     
-                    # Adiciona aos processados
-                    self.processed_files_set.add(str(pdf_path))
+                    def submit_more():
+                        for bucket in buckets:
+                            while bucket["in_flight"] < bucket["limit"]:
+                                item = next(bucket["batches"], None)
+                                if item is None:
+                                    break
+                                batch, inputs = item
+                                future = executor.submit(
+                                    _compress_pdf_chunk, self.gs_path,
+                                    inputs, [output_path for _, output_path, _ in batch], dpi,
+                                    chunk_settings, [size for _, _, size in batch]
+                                )
+                                pending[future] = (batch, inputs, bucket)
+                                bucket["in_flight"] += 1
                     
-                    # Estatísticas
-                    if success:
-                        compression_ratio = ((original_size - compressed_size) / original_size) * 100
+                    submit_more()
+                    while pending and not self._stop:
+                        # Timeout curto: o sinal de parada é visto mesmo com lotes longos
+                        done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                        if self._stop:
+                            break  # Lotes interrompidos não entram como processados
+                        for future in done:
+                            batch, inputs, bucket = pending.pop(future)
+                            bucket["in_flight"] -= 1
+                            try:
+                                results = future.result()
+                            except Exception as e:
+                                results = [(False, f"Erro: {str(e)[:100]}", 0, 0)] * len(batch)
+                            
+                            # Remove cópias locais do lote
+                            if scratch_folder:
+                                for (pdf_path, _, _), staged_path in zip(batch, inputs):
+                                    if staged_path != pdf_path:
+                                        try:
+                                            os.remove(staged_path)
+                                        except OSError:
+                                            pass
+                            
+                            for (pdf_path, _, _), result in zip(batch, results):
+                                self._handle_result(pdf_path, result, len(pdfs), checkpoint_interval)
                         
-                        if compression_ratio >= 50:
-                            self.stats["compression_ranges"]["excellent"] += 1
-                        elif compression_ratio >= 30:
-                            self.stats["compression_ranges"]["good"] += 1
-                        elif compression_ratio >= 15:
-                            self.stats["compression_ranges"]["moderate"] += 1
-                        else:
-                            self.stats["compression_ranges"]["low"] += 1
-                        
-                        self.stats["total_compressed"] += 1
-                        self.stats["total_original_bytes"] += original_size
-                        self.stats["total_final_bytes"] += compressed_size
-                        self.stats["space_saved_bytes"] += (original_size - compressed_size)
-                        
-                        print(f"   ✅ {message}")
-                        print(f"   📦 {self._format_size(original_size)} → {self._format_size(compressed_size)}\n")
-                    else:
-                        self.stats["total_errors"] += 1
-                        print(f"   ⚠️  {message}\n")
-                    
-                    # Salva checkpoint a cada 10 arquivos
-                    if idx % 10 == 0:
-                        self._save_checkpoint()
-                        self._save_progress()
-                
-                except KeyboardInterrupt:
-                    print("\n\n⏸️  Ctrl+C detectado! Salvando progresso e encerrando...")
-                    self._save_checkpoint()
-                    self._save_progress()
-                    print("✅ Progresso salvo! Você pode retomar depois executando novamente.\n")
-                    sys.exit(0)
-                        
-                except Exception as e:
-                    print(f"   ❌ Erro: {str(e)}\n")
-                    self.stats["total_errors"] += 1
-                    self.processed_files_set.add(str(pdf_path))
+                        submit_more()
+            finally:
+                # Sempre grava o checkpoint: fim normal, Ctrl+C, SIGTERM ou erro inesperado
+                self._close_progress()
+                if executor:
+                    if self._stop:
+                        # Sem isso o join do atexit esperaria cada lote do gs terminar (minutos)
+                        _kill_pool_workers(executor)
+                    executor.shutdown(wait=not self._stop, cancel_futures=self._stop)
+                self._save_checkpoint()
+                self._close_checkpoint_log()
+                if scratch_folder:
+                    shutil.rmtree(scratch_folder, ignore_errors=True)
+            
+            if self._stop:
+                print("\n\n⏸️  Ctrl+C detectado! Salvando progresso e encerrando...")
+                self._save_progress()
+                print("✅ Progresso salvo! Você pode retomar depois executando novamente.\n")
+                sys.exit(0)
         
         # Copia arquivos não-PDF
         if len(other_files) > 0:
@@ -439,20 +1353,36 @@ class AggressivePDFCompressor:
             print(f"📅 Fase de cópia iniciada: {self.session_info['copy_phase_start']}")
             print(f"{'='*60}\n")
             
+            # Cópias liberam o GIL durante o I/O: threads aproveitam a fila do disco
+            copy_workers = self.config.get("copy_workers", 16)
+            copy_outputs = self._output_paths(other_files, root_path, compress_folder)
             copied_count = 0
-            for idx, file_path in enumerate(other_files, 1):
-                try:
-                    if self._copy_other_file(file_path, Path(root_path), compress_folder):
-                        copied_count += 1
+            executor = ThreadPoolExecutor(max_workers=copy_workers)
+            try:
+                # Janela limitada (como na fase dos PDFs): sem um Future por arquivo de uma vez
+                copy_tasks = zip(other_files, copy_outputs)
+                pending = {executor.submit(self._copy_other_file, file_path, output_path)
+                           for file_path, output_path in islice(copy_tasks, copy_workers * 4)}
+                idx = 0
+                while pending and not self._stop:
+                    # Timeout curto: o sinal de parada é visto mesmo durante uma cópia longa
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        idx += 1
+                        if future.result():
+                            copied_count += 1
+                        if idx % 100 == 0:
+                            print(f"\r   📋 Copiados: {copied_count:,}/{idx:,}", end="", flush=True)
                     
-                    if idx % 100 == 0:
-                        print(f"\r   📋 Copiados: {copied_count:,}/{idx:,}", end="", flush=True)
-                
-                except KeyboardInterrupt:
-                    print("\n\n⏸️  Ctrl+C detectado durante cópia!")
-                    break
-                except Exception as e:
-                    pass
+                    for file_path, output_path in islice(copy_tasks, len(done)):
+                        pending.add(executor.submit(self._copy_other_file, file_path, output_path))
+            except KeyboardInterrupt:
+                self._stop = True
+            finally:
+                executor.shutdown(wait=not self._stop, cancel_futures=self._stop)
+            
+            if self._stop:
+                print("\n\n⏸️  Ctrl+C detectado durante cópia!")
             
             print(f"\r   ✅ Copiados: {copied_count:,}/{len(other_files):,} arquivos          \n")
         
@@ -460,40 +1390,9 @@ class AggressivePDFCompressor:
         self._print_summary(compress_folder)
         self._cleanup_checkpoint()
     
-    def _save_progress(self):
-        """Salva log de progresso durante execução (resumo geral + últimos 1000 arquivos)"""
+    def _save_progress(self, status: str = "in_progress"):
+        """Salva o resumo geral (no fim ou no Ctrl+C; o histórico por arquivo fica no .jsonl)"""
         try:
-            # Carrega log existente para manter histórico
-            processed_history = []
-            existing_files_set = set()  # OTIMIZAÇÃO: set para verificação O(1)
-            
-            if os.path.exists(self.log_file_path):
-                try:
-                    with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                        existing_log = json.load(f)
-                        processed_history = existing_log.get("processed_files_history", [])
-                        # Cria set de arquivos existentes (MUITO mais rápido)
-                        existing_files_set = {item.get("file") for item in processed_history}
-                except:
-                    pass
-            
-            # Adiciona apenas novos arquivos (verificação O(1) com set)
-            new_files = []
-            for file_path in self.processed_files_set:
-                if file_path not in existing_files_set:
-                    new_files.append({
-                        "file": file_path,
-                        "timestamp": datetime.now().isoformat(),
-                        "status": "processed"
-                    })
-            
-            # Adiciona novos ao histórico
-            processed_history.extend(new_files)
-            
-            # Mantém apenas os últimos 1000 (FIFO - First In First Out)
-            if len(processed_history) > 1000:
-                processed_history = processed_history[-1000:]
-            
             # Calcula porcentagem de conclusão
             total_processed = len(self.processed_files_set)
             completion_pct = (total_processed / self.stats['total_found'] * 100) if self.stats['total_found'] > 0 else 0
@@ -501,10 +1400,9 @@ class AggressivePDFCompressor:
             # Salva log completo com resumo no topo
             log_data = {
                 "log_info": {
-                    "description": "Log rotativo - mantém resumo geral + últimos 1000 arquivos processados",
+                    "description": "Resumo geral - histórico por arquivo no log rotativo .jsonl",
                     "last_update": datetime.now().isoformat(),
-                    "total_files_in_history": len(processed_history),
-                    "history_limit": 1000
+                    "history_file": os.path.splitext(self.log_file_path)[0] + ".jsonl"
                 },
                 "session_info": {
                     "first_start": self.session_info['first_start'],
@@ -516,7 +1414,7 @@ class AggressivePDFCompressor:
                 "summary": {
                     "execution_start": self.start_time.isoformat() if self.start_time else datetime.now().isoformat(),
                     "last_update": datetime.now().isoformat(),
-                    "status": "in_progress",
+                    "status": status,
                     "completion_percentage": round(completion_pct, 2),
                     "statistics": {
                         "total_found": self.stats["total_found"],
@@ -528,20 +1426,24 @@ class AggressivePDFCompressor:
                         "space_saved": self._format_size(self.stats["space_saved_bytes"]),
                         "compression_ranges": self.stats["compression_ranges"]
                     }
-                },
-                "processed_files_history": processed_history
+                }
             }
             
-            with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                json.dump(log_data, f, indent=2, ensure_ascii=False)
+            with open(self.log_file_path, 'wb') as f:
+                f.write(_json_dumps(log_data, indent=True))
         except Exception as e:
             pass  # Não interrompe se falhar
     
     def _cleanup_checkpoint(self):
         """Remove checkpoint após conclusão bem-sucedida"""
         try:
-            if os.path.exists(self.checkpoint_file):
-                os.remove(self.checkpoint_file)
+            self._close_checkpoint_log()
+            removed = False
+            for path in (self.checkpoint_file, self.checkpoint_log_file):
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed = True
+            if removed:
                 print(f"\n✅ Checkpoint removido (processo concluído)")
         except:
             pass
@@ -582,7 +1484,7 @@ class AggressivePDFCompressor:
         print(f"📂 Arquivos em: {compress_folder}")
         print(f"{'='*60}\n")
         
-        self._save_progress()
+        self._save_progress("completed")
 
 
 def main():
@@ -594,6 +1496,9 @@ def main():
     ╚════════════════════════════════════════════════════════════╝
     """)
     
+    # Crash nativo (qpdf/gs) ainda mostra o traceback Python
+    faulthandler.enable()
+    
     try:
         compressor = AggressivePDFCompressor()
         compressor.process_all_pdfs()
@@ -9,14 +9,700 @@ import os
 import sys
 import json
 import shutil
+import subprocess
+import time
+import heapq
+import hashlib
 import zlib
+from functools import lru_cache
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Tuple
 import pikepdf
 from PIL import Image
+from tqdm import tqdm
 import io
 
+try:
+    import deflate  # Opcional: libdeflate (DEFLATE bem mais rápido que o zlib)
+except ImportError:
+    deflate = None
+
+try:
+    import mozjpeg_lossless_optimization  # Opcional: otimização de JPEG 100% sem perdas
+except ImportError:
+    mozjpeg_lossless_optimization = None
+
+try:
+    import orjson  # Opcional: serialização JSON bem mais rápida (logs e checkpoint)
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash  # Opcional: hash rápido dos caminhos processados (resume)
+except ImportError:
+    xxhash = None
+
+PATH_HASH_NAME = "xxh3_64" if xxhash is not None else "blake2b_64"
+
+
+# Nomes PDF usados no laço de imagens: pikepdf.Name.X cria um objeto novo a cada acesso
+_N_DEVICEGRAY = pikepdf.Name.DeviceGray
+_N_DEVICERGB = pikepdf.Name.DeviceRGB
+_N_XOBJECT = pikepdf.Name.XObject
+_N_IMAGE = pikepdf.Name.Image
+_N_FLATE = pikepdf.Name.FlateDecode
+_N_DCT = pikepdf.Name.DCTDecode
+
+
+def _path_hash(path: str) -> int:
+    """Hash estável de 64 bits do caminho (o set de processados guarda ints em vez de strings)
+    normpath: o scan e o log gravam o mesmo arquivo em formatos diferentes (str cru vs str(Path),
+    "/" vs "\\" no Windows, root_path com barra no fim) - sem isso o PDF seria comprimido de novo"""
+    data = os.fsencode(os.path.normpath(path))
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def _json_dumps(data, indent: bool = False) -> bytes:
+    """Serializa para JSON em UTF-8 (orjson se disponível, senão json da stdlib)"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+
+def _json_loads(data):
+    """Desserializa JSON (str ou bytes)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _deflate(data: bytes, level: int = 7) -> bytes:
+    """Comprime bytes no formato zlib esperado pelo FlateDecode (Z_FILTERED favorece dados de imagem)"""
+    if deflate is not None:
+        # Mesmo formato zlib (cabeçalho + Adler-32), mas com libdeflate (retorna bytearray)
+        # libdeflate aceita níveis 1-12 (10-12: busca mais exaustiva, arquivo menor)
+        return bytes(deflate.zlib_compress(data, min(level, 12)))
+    compressor = zlib.compressobj(min(level, 9), zlib.DEFLATED, 15, 8, zlib.Z_FILTERED)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _iter_image_bytes(image: Image.Image, chunk_size: int):
+    """Gera os pixels crus em blocos de ~chunk_size direto do encoder do Pillow (sem crop/cópias extras)"""
+    if image.width == 0 or image.height == 0:
+        return
+    try:
+        image.load()
+        encoder = Image._getencoder(image.mode, 'raw', image.mode)
+        encoder.setimage(image.im, (0, 0) + image.size)
+    except Exception:
+        # API interna do Pillow mudou: usa o caminho público
+        yield image.tobytes()
+        return
+    # O encoder raw precisa de espaço para pelo menos uma linha
+    chunk_size = max(chunk_size, image.width * len(image.getbands()))
+    while True:
+        _, errcode, data = encoder.encode(chunk_size)
+        yield data
+        if errcode:
+            break
+    if errcode < 0:
+        raise RuntimeError(f"encoder error {errcode}")
+
+
+def _image_to_bytes(image: Image.Image) -> bytes:
+    """Pixels crus em uma única chamada do encoder (tobytes() junta blocos de 64 KB e dobra a memória)"""
+    try:
+        parts = list(_iter_image_bytes(image, image.width * image.height * len(image.getbands())))
+    except Exception:
+        return image.tobytes()
+    return parts[0] if len(parts) == 1 else b"".join(parts)
+
+
+def _raster_deflate_level(compress_settings: dict) -> int:
+    """
+    Nível do deflate das imagens ("deflate_level"; null = automático).
+    1-3: rápido | 6: equilíbrio | 9: máximo do zlib | 10-12: só libdeflate, menor arquivo.
+    """
+    level = compress_settings.get("deflate_level")
+    if level is None:
+        # libdeflate no nível 10 ainda é mais rápido que o zlib no 9. Sem ela o save() usa
+        # recompress_flate: o qpdf re-deflata todo stream Flate (imagens inclusive) com o flate_level,
+        # então aqui basta o nível 1 - só decide se a imagem diminui, a compressão final é a do save
+        level = 10 if deflate is not None else 1
+    return level
+
+
+# Maior diferença medida entre libdeflate nível 1 e nível 10 em imagens (~1,65x) + folga
+_SCOUT_MARGIN = 1.75
+
+
+def _scout_rejects(data: bytes, level: int, target_size: int) -> bool:
+    """
+    Passada de reconhecimento com libdeflate nível 1 (bem mais barata que os níveis altos).
+    Se nem com folga chega perto do tamanho atual, o nível alto também não vai ganhar
+    (ex: imagens com preditor PNG, que ficam menores que o deflate puro).
+    """
+    if deflate is None or not target_size or level < 6:
+        return False
+    return len(deflate.zlib_compress(data, 1)) > target_size * _SCOUT_MARGIN
+
+
+def _deflate_image(image: Image.Image, level: int = 7, target_size: int = 0):
+    """
+    Comprime os pixels da imagem em faixas de linhas (sem alocar o buffer W*H inteiro).
+    Com target_size, retorna None quando a passada de reconhecimento mostra que não há ganho.
+    """
+    if deflate is not None:
+        # libdeflate não tem modo streaming: precisa do buffer completo
+        data = _image_to_bytes(image)
+        if _scout_rejects(data, level, target_size):
+            return None
+        return _deflate(data, level)
+    
+    # Faixas de ~256 KB cabem no cache L2
+    compressor = zlib.compressobj(min(level, 9), zlib.DEFLATED, 15, 8, zlib.Z_FILTERED)
+    parts = [compressor.compress(chunk) for chunk in _iter_image_bytes(image, 256 * 1024)]
+    parts.append(compressor.flush())
+    return b"".join(parts)
+
+
+def _is_already_optimized(input_path: Path, original_size: int, max_size: int) -> bool:
+    """
+    Pré-verificação barata (só cabeçalho e final do arquivo, sem abrir com pikepdf)
+    PDF 1.5+ linearizado e com object streams quase nunca diminui ao ser regravado.
+    """
+    if original_size <= 0 or original_size >= max_size:
+        return False
+    
+    with open(input_path, 'rb') as f:
+        head = f.read(1024)
+        f.seek(max(0, original_size - 4096))
+        tail = f.read()
+    
+    # Object streams só existem a partir do PDF 1.5
+    try:
+        version = float(head[5:8])
+    except ValueError:
+        return False
+    if not head.startswith(b"%PDF-") or version < 1.5:
+        return False
+    return b"/Linearized" in head and b"/ObjStm" in head + tail
+
+
+def _compress_pdf_worker(input_path: Path, output_path: Path, compress_settings: dict) -> Tuple[bool, str, int, int, str]:
+    """
+    Comprime um PDF individual (função de módulo para rodar em processos separados)
+    Cópias de fallback usam copyfile (sendfile no Linux), sem copiar metadados.
+    Retorna: (sucesso, mensagem, tamanho_original, tamanho_comprimido, categoria_erro)
+    """
+    # Um único stat() por PDF, reaproveitado em todos os retornos (inclusive de erro)
+    try:
+        original_size = input_path.stat().st_size
+    except OSError:
+        original_size = 0
+    
+    # Pré-verificação: evita abrir e regravar só para descobrir que não há ganho
+    if compress_settings.get("skip_precompressed", True):
+        try:
+            if _is_already_optimized(input_path, original_size, compress_settings.get("precheck_max_mb", 20) * 1024 * 1024):
+                shutil.copyfile(input_path, output_path)
+                return False, "PDF já otimizado (pré-verificação) - arquivo copiado", original_size, original_size, "already_optimized"
+        except OSError:
+            pass
+    
+    try:
+        # Abre o PDF com pikepdf
+        with _open_pdf(input_path) as pdf:
+            # Remove objetos duplicados para reduzir tamanho
+            if compress_settings.get("remove_duplicates", True):
+                try:
+                    pdf.remove_unreferenced_resources()
+                except:
+                    pass
+            
+            # Processa imagens no PDF para reduzir tamanho (com qualidade alta)
+            # PDFs com poucas imagens: o save() (object streams + deflate) já captura quase todo o ganho
+            recompress_images = compress_settings.get("recompress_images", True)
+            bypass_bytes = compress_settings.get("image_bypass_threshold_kb", 0) * 1024
+            if recompress_images and bypass_bytes and _total_image_bytes(pdf) < bypass_bytes:
+                recompress_images = False
+            
+            if recompress_images:
+                _compress_images_in_pdf(pdf, compress_settings)
+            
+            # Nível do deflate usado pelo qpdf ao gravar (configuração global do processo; zlib vai só até 9)
+            flate_level = compress_settings.get("flate_level", 7)
+            pikepdf.settings.set_flate_compression_level(min(flate_level, 9))
+            
+            # Com libdeflate os streams Flate são recomprimidos aqui: o recompress_flate do qpdf
+            # refaria tudo com zlib (inclusive as imagens já recomprimidas acima)
+            recompress_with_qpdf = deflate is None
+            if not recompress_with_qpdf:
+                _recompress_flate_streams(pdf, flate_level, skip_images=recompress_images)
+            
+            # Salva com máxima compressão
+            # compress_streams: comprime todos os streams
+            # stream_decode_level.generalized: máxima descompressão antes de recomprimir
+            # object_stream_mode.generate: agrupa objetos em streams para melhor compressão
+            # linearize: "fast web view" - exige uma segunda passada de escrita, desligado por padrão
+            pdf.save(
+                output_path,
+                compress_streams=True,
+                stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                linearize=compress_settings.get("linearize", False),
+                recompress_flate=recompress_with_qpdf  # Recomprime streams deflate para máxima compressão
+            )
+        
+        compressed_size = output_path.stat().st_size
+        
+        # Calcula taxa de compressão
+        compression_ratio = ((original_size - compressed_size) / original_size) * 100 if original_size > 0 else 0
+        
+        # Verifica se realmente comprimiu
+        if compressed_size >= original_size:
+            # Copia o arquivo original ao invés de remover
+            shutil.copyfile(input_path, output_path)
+            return False, f"PDF já otimizado - sem ganho de compressão", original_size, original_size, "already_optimized"
+        
+        # ACEITA QUALQUER GANHO DE COMPRESSÃO, mesmo que seja 0.1%
+        # Prioridade: qualidade + redução de tamanho (velocidade não importa)
+        return True, f"Comprimido com sucesso ({compression_ratio:.1f}% de redução)", original_size, compressed_size, None
+        
+    except pikepdf.PasswordError:
+        # Copia o arquivo original mesmo com erro
+        try:
+            shutil.copyfile(input_path, output_path)
+        except:
+            pass
+        return False, "PDF protegido por senha - arquivo copiado", original_size, original_size, "password_protected"
+    except pikepdf.PdfError as e:
+        # Copia o arquivo original mesmo com erro
+        try:
+            shutil.copyfile(input_path, output_path)
+        except:
+            pass
+        error_msg = str(e).lower()
+        if "damaged" in error_msg or "corrupt" in error_msg or "invalid" in error_msg:
+            return False, f"PDF corrompido - arquivo copiado", original_size, original_size, "corrupted"
+        return False, f"Erro no PDF - arquivo copiado: {str(e)[:100]}", original_size, original_size, "other_errors"
+    except PermissionError:
+        return False, "PDF em uso ou sem permissão - não copiado", 0, 0, "permission_denied"
+    except Exception as e:
+        # Copia o arquivo original mesmo com erro
+        try:
+            shutil.copyfile(input_path, output_path)
+        except:
+            pass
+        return False, f"Erro desconhecido - arquivo copiado: {str(e)[:100]}", original_size, original_size, "other_errors"
+
+
+def _open_pdf(path: Path) -> pikepdf.Pdf:
+    """Abre o PDF via mmap (o SO só carrega as regiões lidas); se falhar, tenta o modo padrão"""
+    try:
+        return pikepdf.open(path, access_mode=pikepdf.AccessMode.mmap)
+    except pikepdf.PasswordError:
+        raise
+    except Exception:
+        # Alguns PDFs corrompidos (ou sistemas de arquivos de rede) não aceitam mmap
+        return pikepdf.open(path)
+
+
+def _recompress_flate_streams(pdf: pikepdf.Pdf, level: int, skip_images: bool = True):
+    """Recomprime com libdeflate os streams FlateDecode simples (sem preditor)"""
+    stream_type = pikepdf.Stream
+    for obj in pdf.objects:
+        try:
+            if not isinstance(obj, stream_type) or obj.get("/Filter") != _N_FLATE or "/DecodeParms" in obj:
+                continue
+            # Imagens já passaram por _compress_images_in_pdf
+            if skip_images and obj.get("/Subtype") == _N_IMAGE:
+                continue
+            
+            data, original_size = obj.read_bytes(), len(obj.read_raw_bytes())
+            if _scout_rejects(data, level, original_size):
+                continue
+            compressed = _deflate(data, level)
+            if len(compressed) < original_size:
+                obj.write(compressed, filter=_N_FLATE)
+        except Exception:
+            continue
+
+
+def _total_image_bytes(pdf: pikepdf.Pdf) -> int:
+    """Soma o tamanho (comprimido) das imagens do PDF pelo /Length, sem ler os streams"""
+    total = 0
+    stream_type = pikepdf.Stream
+    for obj in pdf.objects:
+        try:
+            if isinstance(obj, stream_type) and obj.get("/Subtype") == _N_IMAGE:
+                total += int(obj.get("/Length", 0))
+        except Exception:
+            continue
+    return total
+
+
+def _max_image_side(pdf: pikepdf.Pdf, max_dpi: int) -> int:
+    """
+    Maior lado (em pixels) que uma imagem precisa ter no DPI alvo
+    Aproximação segura: nenhuma imagem aparece maior que a maior página do PDF.
+    """
+    page_side = 0.0
+    for page in pdf.pages:
+        x0, y0, x1, y1 = (float(v) for v in page.mediabox)
+        page_side = max(page_side, abs(x1 - x0), abs(y1 - y0))
+    # Pontos PDF: 72 por polegada
+    return int(page_side / 72 * max_dpi)
+
+
+def _downscaled_size(width: int, height: int, max_side: int = None, max_pixels: int = 0):
+    """Novo tamanho (mesma proporção) se a imagem passa do lado máximo ou do limite de pixels; senão None"""
+    scale = 1.0
+    if max_side and max(width, height) > max_side:
+        scale = max_side / max(width, height)
+    if max_pixels and width * height > max_pixels:
+        scale = min(scale, (max_pixels / (width * height)) ** 0.5)
+    if scale >= 1.0:
+        return None
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _compress_images_in_pdf(pdf: pikepdf.Pdf, compress_settings: dict):
+    """Comprime imagens dentro do PDF usando técnicas avançadas"""
+    quality = compress_settings.get("image_quality", 95)
+    try:
+        # Redução de resolução (opcional): limite de pixels calculado uma vez por PDF
+        max_side, max_pixels = None, 0
+        if compress_settings.get("downsample_images", False):
+            max_side = _max_image_side(pdf, compress_settings.get("max_dpi", 200)) or None
+            max_pixels = int(compress_settings.get("max_image_megapixels", 0) * 1_000_000)
+        
+        stream_type, array_type = pikepdf.Stream, pikepdf.Array
+        
+        # Itera sobre todos os objetos do PDF para encontrar imagens
+        # pdf.objects já é um snapshot do lado C++: iterar direto (sem list()) cria um
+        # wrapper Python por vez, e os SMask criados no meio da iteração não entram nela
+        for obj in pdf.objects:
+            try:
+                if not isinstance(obj, stream_type) or obj.get("/Subtype") != _N_IMAGE:
+                    continue
+                
+                # Pega o filtro da imagem
+                filt = obj.get("/Filter")
+                if isinstance(filt, array_type) and len(filt) > 0:
+                    filt = filt[0]
+                
+                # Otimiza apenas imagens PNG/Flate (sem perdas) ou JPEG com alta qualidade
+                if filt == _N_FLATE:
+                    # Imagem PNG - usa compressão zlib agressiva
+                    _optimize_flate_image(pdf, obj, compress_settings, max_side, max_pixels)
+                elif filt == _N_DCT:
+                    # Imagem JPEG - recomprime apenas se qualidade for menor que atual
+                    _optimize_jpeg_image(obj, quality, max_side, max_pixels)
+                
+            except Exception as e:
+                # Se falhar em uma imagem, continua com as outras
+                continue
+                
+    except Exception:
+        # Se falhar no processamento de imagens, continua sem comprimir imagens
+        pass
+
+
+def _recompress_raw_flate(obj: pikepdf.Stream, original_size: int, compress_settings: dict,
+                          max_side: int = None, max_pixels: int = 0) -> bool:
+    """
+    Caminho rápido: RGB/cinza de 8 bits em FlateDecode simples, sem preditor nem SMask.
+    Recomprime os bytes já decodificados direto, sem passar pelo PIL.
+    Retorna False quando a imagem precisa do caminho completo.
+    """
+    color_space = obj.get("/ColorSpace")
+    if obj.get("/Filter") != _N_FLATE or obj.get("/BitsPerComponent") != 8:
+        return False
+    if color_space not in (_N_DEVICERGB, _N_DEVICEGRAY) or "/SMask" in obj:
+        return False
+    decode_parms = obj.get("/DecodeParms")
+    if isinstance(decode_parms, pikepdf.Dictionary) and decode_parms.get("/Predictor", 1) != 1:
+        return False
+    
+    width, height = int(obj.get("/Width", 0)), int(obj.get("/Height", 0))
+    if _downscaled_size(width, height, max_side, max_pixels):
+        return False  # Precisa reduzir a resolução
+    if color_space == _N_DEVICERGB and compress_settings.get("allow_lossy", False):
+        return False  # Pode virar JPEG
+    
+    raw = obj.read_bytes()
+    channels = 3 if color_space == _N_DEVICERGB else 1
+    if len(raw) != width * height * channels:
+        return False  # Stream truncado/com sobra: deixa o PIL tratar
+    
+    level = _raster_deflate_level(compress_settings)
+    if _scout_rejects(raw, level, original_size):
+        return True  # Já está melhor comprimida do que conseguiríamos
+    compressed = _deflate(raw, level)
+    if len(compressed) < original_size:
+        obj.write(compressed, filter=_N_FLATE)
+    return True
+
+
+# Chaves de renderização copiadas para o dicionário reconstruído da imagem
+# (/Decode não entra: imagens com Decode remapeado nunca são reescritas)
+_KEPT_IMAGE_KEYS = ("/Intent", "/Interpolate", "/Matte")
+
+
+def _kept_image_keys(obj: pikepdf.Stream) -> dict:
+    """Chaves de _KEPT_IMAGE_KEYS presentes na imagem (para repassar ao novo dicionário)"""
+    return {key[1:]: obj[key] for key in _KEPT_IMAGE_KEYS if key in obj}
+
+
+def _optimize_flate_image(pdf: pikepdf.Pdf, obj: pikepdf.Stream, compress_settings: dict,
+                          max_side: int = None, max_pixels: int = 0):
+    """Otimiza imagens PNG/Flate usando compressão zlib (técnica da minimalpdfcompress)"""
+    try:
+        # Máscaras 1-bit e imagens com /Decode não sobrevivem à conversão: ficam como estão
+        if obj.get("/ImageMask", False) or "/Decode" in obj:
+            return
+        
+        # SMask com /Matte (cores pré-multiplicadas) ou de outro tamanho: o as_pil_image() juntaria
+        # a máscara num RGBA e ela seria recriada sem /Matte e reamostrada - fica como está
+        smask = obj.get("/SMask")
+        if isinstance(smask, pikepdf.Stream) and ("/Matte" in smask or (
+                smask.get("/Width"), smask.get("/Height")) != (obj.get("/Width"), obj.get("/Height"))):
+            return
+        # A própria máscara com /Matte precisa manter o tamanho da imagem-mãe
+        if "/Matte" in obj:
+            max_side, max_pixels = None, 0
+        
+        original_size = len(obj.read_raw_bytes())
+        if original_size == 0:
+            return
+        
+        if _recompress_raw_flate(obj, original_size, compress_settings, max_side, max_pixels):
+            return
+        
+        flate_level = _raster_deflate_level(compress_settings)
+        
+        # Extrai a imagem
+        pdfimage = pikepdf.PdfImage(obj)
+        pil_image = pdfimage.as_pil_image()
+        
+        # Reduz a resolução de imagens maiores que o necessário (DPI alvo / limite de megapixels)
+        new_size = _downscaled_size(pil_image.width, pil_image.height, max_side, max_pixels)
+        if new_size:
+            if pil_image.mode in ('1', 'P'):
+                # LANCZOS não funciona em paleta/1-bit
+                pil_image = pil_image.convert('L' if pil_image.mode == '1' else 'RGB')
+            pil_image.thumbnail(new_size, Image.Resampling.LANCZOS)
+        
+        # Verifica se tem transparência
+        has_transparency = 'A' in pil_image.mode
+        
+        if has_transparency:
+            # Extrai o alpha uma única vez (getchannel copia só essa banda)
+            alpha_image = pil_image.getchannel('A')
+            # Alpha todo 255 (opaco): dispensa o SMask e segue como imagem sem transparência
+            if alpha_image.getextrema() == (255, 255):
+                has_transparency = False
+        
+        if has_transparency:
+            # Separa RGB e Alpha para melhor compressão
+            if pil_image.mode != 'RGBA':
+                pil_image = pil_image.convert('RGBA')
+            
+            # Cores sem mistura com fundo: o SMask já aplica a transparência na renderização
+            rgb_image = pil_image.convert('RGB')
+            
+            # Comprime RGB e Alpha separadamente (só as cores já precisam ficar abaixo do original)
+            compressed_rgb = _deflate_image(rgb_image, flate_level, original_size)
+            if compressed_rgb is None:
+                return
+            compressed_alpha = _deflate_image(alpha_image, flate_level)
+            total_new_size = len(compressed_rgb) + len(compressed_alpha)
+            
+            if total_new_size < original_size:
+                # Troca o dicionário inteiro de uma vez (em vez de apagar chave por chave);
+                # /Length e /Filter são definidos pelo write()
+                obj.stream_dict = pikepdf.Dictionary(
+                    Type=_N_XOBJECT,
+                    Subtype=_N_IMAGE,
+                    Width=pil_image.width,
+                    Height=pil_image.height,
+                    ColorSpace=_N_DEVICERGB,
+                    BitsPerComponent=8,
+                    **_kept_image_keys(obj),
+                )
+                obj.write(compressed_rgb, filter=_N_FLATE)
+                
+                # Cria stream SMask para transparência
+                smask_stream = pdf.make_stream(compressed_alpha)
+                smask_stream.Type = _N_XOBJECT
+                smask_stream.Subtype = _N_IMAGE
+                smask_stream.Filter = _N_FLATE
+                smask_stream.Width = pil_image.width
+                smask_stream.Height = pil_image.height
+                smask_stream.ColorSpace = _N_DEVICEGRAY
+                smask_stream.BitsPerComponent = 8
+                obj.SMask = smask_stream
+        else:
+            # Sem transparência - comprime direto
+            # Tons de cinza continuam em cinza (inclusive SMasks, que precisam ser DeviceGray)
+            if pil_image.mode == 'L':
+                color_space = _N_DEVICEGRAY
+            else:
+                color_space = _N_DEVICERGB
+                if pil_image.mode != 'RGB':
+                    pil_image = pil_image.convert('RGB')
+            
+            compressed_rgb = _deflate_image(pil_image, flate_level, original_size)
+            new_data, new_filter = compressed_rgb, _N_FLATE
+            best_size = len(compressed_rgb) if compressed_rgb is not None else original_size
+            
+            # Fotos coloridas guardadas sem perdas (alta entropia) viram JPEG, se permitido
+            if (compress_settings.get("allow_lossy", False) and color_space == _N_DEVICERGB
+                    and pil_image.convert('L').entropy() > 7.0):
+                jpeg_buffer = io.BytesIO()
+                pil_image.save(jpeg_buffer, **_jpeg_save_params(compress_settings.get("jpeg_quality", 85)))
+                # tell() = tamanho gerado: só copia o buffer para bytes se for usar
+                if jpeg_buffer.tell() < best_size:
+                    new_data, new_filter = jpeg_buffer.getvalue(), _N_DCT
+            
+            if new_data is not None and len(new_data) < original_size:
+                # Troca o dicionário inteiro de uma vez, mantendo só o /SMask (transparência em stream separado)
+                new_dict = pikepdf.Dictionary(
+                    Type=_N_XOBJECT,
+                    Subtype=_N_IMAGE,
+                    Width=pil_image.width,
+                    Height=pil_image.height,
+                    ColorSpace=color_space,
+                    BitsPerComponent=8,
+                    **_kept_image_keys(obj),
+                )
+                if smask is not None:
+                    new_dict.SMask = smask
+                obj.stream_dict = new_dict
+                obj.write(new_data, filter=new_filter)
+    
+    except Exception:
+        pass
+
+
+# jpegtran (libjpeg/mozjpeg) no PATH: alternativa sem perdas quando o pacote Python não está instalado
+JPEGTRAN_PATH = shutil.which("jpegtran")
+
+
+# Tabela de quantização de luminância padrão do JPEG (IJG, qualidade 50)
+_STD_LUMINANCE_QTABLE = (
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99,
+)
+
+
+def _estimate_jpeg_quality(raw: bytes) -> int:
+    """Estima a qualidade (escala IJG 1-100) pela tabela de luminância - só lê o cabeçalho"""
+    tables = Image.open(io.BytesIO(raw)).quantization
+    if not tables:
+        return 100
+    luminance = tables.get(0) or next(iter(tables.values()))
+    scale = sum(luminance) * 100 / sum(_STD_LUMINANCE_QTABLE)
+    estimated = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+    return int(round(min(100, max(1, estimated))))
+
+
+@lru_cache(maxsize=None)
+def _jpeg_save_params(quality: int) -> dict:
+    """Argumentos do save JPEG, montados uma vez por qualidade (4:2:0 = padrão do libjpeg, explícito)"""
+    return {"format": "JPEG", "quality": quality, "subsampling": 2, "optimize": True, "progressive": True}
+
+
+def _optimize_jpeg_lossless(raw: bytes) -> bytes:
+    """Refaz só a codificação Huffman (progressiva) do JPEG, sem mexer nos coeficientes"""
+    if mozjpeg_lossless_optimization is not None:
+        # COPY_MARKERS.ALL mantém ICC e o marcador Adobe (JPEGs CMYK)
+        return mozjpeg_lossless_optimization.optimize(raw, mozjpeg_lossless_optimization.COPY_MARKERS.ALL)
+    
+    if JPEGTRAN_PATH:
+        # Mesma transformação via subprocesso (stdin -> stdout, sem arquivos temporários)
+        result = subprocess.run(
+            [JPEGTRAN_PATH, '-copy', 'all', '-optimize', '-progressive'],
+            input=raw,
+            capture_output=True,
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        )
+        if result.returncode == 0 and result.stdout.startswith(b'\xff\xd8'):
+            return result.stdout
+    
+    # Sem mozjpeg: Pillow regrava com as mesmas tabelas e subamostragem ("keep") -
+    # quase sem perdas (decodifica e recodifica, então o croma pode variar um pouco)
+    source = Image.open(io.BytesIO(raw))
+    if source.mode not in ('L', 'RGB'):
+        return raw
+    output = io.BytesIO()
+    source.save(output, format='JPEG', quality='keep', subsampling='keep', optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def _optimize_jpeg_image(obj: pikepdf.Stream, quality: int, max_side: int = None, max_pixels: int = 0):
+    """Otimiza imagens JPEG mantendo alta qualidade"""
+    try:
+        raw = obj.read_raw_bytes()
+        original_size = len(raw)
+        if original_size == 0:
+            return
+        
+        candidates = []
+        
+        # 1) Sem perdas: otimização das tabelas de Huffman
+        try:
+            candidates.append(_optimize_jpeg_lossless(raw))
+        except Exception:
+            pass
+        
+        # 2) Recompressão com qualidade alta (só RGB/cinza, mantendo o espaço de cor original)
+        # JPEG já na qualidade alvo (ou abaixo) não ganha nada com decodificar e recodificar
+        try:
+            reencode = _estimate_jpeg_quality(raw) > quality + 3
+        except Exception:
+            reencode = True
+        # Imagem acima da resolução necessária é recodificada mesmo já estando na qualidade alvo
+        new_size = _downscaled_size(int(obj.get("/Width", 0)), int(obj.get("/Height", 0)), max_side, max_pixels)
+        resized_data = None
+        if (reencode or new_size) and "/Decode" not in obj:
+            # Decodifica o JPEG direto: PdfImage juntaria o /SMask num RGBA só para descartá-lo
+            # (o alpha continua no stream do SMask, só as cores são regravadas)
+            pil_image = Image.open(io.BytesIO(raw))
+            if pil_image.mode in ('L', 'RGB'):
+                if new_size:
+                    # thumbnail usa draft(): o libjpeg já decodifica em 1/2, 1/4 ou 1/8 quando dá
+                    pil_image.thumbnail(new_size, Image.Resampling.LANCZOS)
+                img_byte_arr = io.BytesIO()
+                pil_image.save(img_byte_arr, **_jpeg_save_params(quality))
+                # tell() = tamanho gerado: só copia o buffer para bytes se puder ganhar
+                if img_byte_arr.tell() < min(original_size, *map(len, candidates)):
+                    candidates.append(img_byte_arr.getvalue())
+                    if new_size:
+                        resized_data = candidates[-1]
+        
+        # Só substitui se for menor
+        best = min(candidates, key=len, default=raw)
+        if len(best) < original_size:
+            obj.write(best, filter=_N_DCT)
+            if best is resized_data:
+                # O /SMask pode ter outra resolução: o PDF escala os dois para a mesma área
+                obj.Width = pil_image.width
+                obj.Height = pil_image.height
+    
+    except Exception:
+        pass
+
 
 class PDFCompressor:
     """Classe principal para compressão de PDFs"""
@@ -25,8 +711,17 @@ class PDFCompressor:
         """Inicializa o compressor com configurações"""
         self.config = self._load_config(config_path)
         self.log_file_path = self.config["log_file"]
+        # Eventos por arquivo (append-only): uma linha JSON por PDF processado
+        self.events_file_path = self.log_file_path + ".events.jsonl"
+        self._jsonl = None
+        self.log_flush_interval = self.config.get("log_flush_interval", 100)
+        self._last_log_flush = time.monotonic()
+        self._files_since_log_flush = 0
+        # Histórico dos últimos 1000 arquivos (mantido incrementalmente para o log)
+        self._history = deque(maxlen=1000)
+        self._history_paths = set()
         self.checkpoint_file = "checkpoint_pikepdf.json"
-        self.processed_files_set = set()  # Arquivos já processados (para resume)
+        self.processed_files_set = set()  # Hashes dos arquivos já processados (para resume)
         self.stats = {
             "total_found": 0,
             "total_compressed": 0,
@@ -39,25 +734,33 @@ class PDFCompressor:
             "errors": [],
             "processed_files": [],
             # Estatísticas detalhadas por tipo de erro
-            "error_breakdown": {
+            "error_breakdown": Counter({
                 "already_optimized": 0,  # Já está comprimido ao máximo
                 "minimal_gain": 0,       # Compressão < 5%
                 "password_protected": 0,
                 "corrupted": 0,
                 "permission_denied": 0,
                 "other_errors": 0
-            },
+            }),
             # Estatísticas de compressão
-            "compression_ranges": {
+            "compression_ranges": Counter({
                 "excellent": 0,      # > 50%
                 "good": 0,           # 30-50%
                 "moderate": 0,       # 15-30%
                 "low": 0,            # 5-15%
                 "minimal": 0         # < 5%
-            }
+            })
         }
         self.current_status = ""
         self.start_time = None
+        # Informações de sessão (para resume)
+        self.session_info = {
+            "first_start": None,
+            "current_start": None,
+            "resume_count": 0,
+            "last_resume": None,
+            "copy_phase_start": None
+        }
         
         # Inicializa o arquivo de log
         self._initialize_log()
@@ -141,25 +844,42 @@ class PDFCompressor:
         }
         
         try:
-            with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                json.dump(log_data, f, indent=2, ensure_ascii=False)
+            with open(self.log_file_path, 'wb') as f:
+                f.write(_json_dumps(log_data, indent=True))
         except Exception as e:
             print(f"⚠️  Aviso: Não foi possível criar o log inicial: {e}")
     
+    def _write_json_atomic(self, path: str, data, indent: bool = False):
+        """Grava JSON em arquivo temporário e troca com os.replace (nunca fica pela metade)"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_json_dumps(data, indent))
+        os.replace(tmp_path, path)
+    
     def _load_checkpoint(self) -> bool:
         """Carrega checkpoint de execução anterior (se existir)"""
         try:
             if os.path.exists(self.checkpoint_file):
-                with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
-                    checkpoint = json.load(f)
-                
-                # Restaura lista de arquivos processados
-                self.processed_files_set = set(checkpoint.get('processed_files', []))
+                with open(self.checkpoint_file, 'rb') as f:
+                    checkpoint = _json_loads(f.read())
                 
-                # Restaura estatísticas parciais
-                saved_stats = checkpoint.get('stats', {})
+                saved_stats = checkpoint.get('stats')
                 if saved_stats:
+                    # Formato antigo: lista de processados e estatísticas completas dentro do JSON
+                    processed = checkpoint.get('processed_files', [])
+                    if checkpoint.get('path_hash', PATH_HASH_NAME) != PATH_HASH_NAME:
+                        print(f"⚠️  Checkpoint usa hash {checkpoint.get('path_hash')} (atual: {PATH_HASH_NAME}) - arquivos serão reprocessados")
+                        processed = []
+                    self.processed_files_set = {p if isinstance(p, int) else _path_hash(p) for p in processed}
                     self.stats.update(saved_stats)
+                    # JSON devolve dicts comuns - volta para Counter
+                    self.stats["error_breakdown"] = Counter(self.stats.get("error_breakdown", {}))
+                    self.stats["compression_ranges"] = Counter(self.stats.get("compression_ranges", {}))
+                    for file_info in self.stats["processed_files"][-self._history.maxlen:]:
+                        self._add_to_history(file_info)
+                else:
+                    # Processados e estatísticas são reconstruídos do log de eventos (append-only)
+                    self._replay_events_log()
                 
                 # Atualiza info de sessão
                 self.session_info["resume_count"] = checkpoint.get('resume_count', 0) + 1
@@ -181,20 +901,32 @@ class PDFCompressor:
         
         return False
     
+    def _replay_events_log(self):
+        """Reconstrói processados e estatísticas relendo o log de eventos uma única vez"""
+        try:
+            with open(self.events_file_path, 'rb') as f:
+                for line in f:
+                    try:
+                        file_info = _json_loads(line)
+                    except ValueError:
+                        continue  # Linha incompleta (ex: queda no meio da escrita)
+                    self._apply_result(file_info)
+        except FileNotFoundError:
+            pass
+    
     def _save_checkpoint(self):
-        """Salva checkpoint com progresso atual"""
+        """Salva checkpoint com progresso atual (só dados da sessão: os arquivos ficam no log de eventos)"""
         try:
             checkpoint = {
-                'processed_files': list(self.processed_files_set),
-                'stats': self.stats,
+                'events_file': self.events_file_path,
                 'last_update': datetime.now().isoformat(),
                 'first_start': self.session_info['first_start'],
                 'resume_count': self.session_info['resume_count'],
                 'copy_phase_start': self.session_info['copy_phase_start']
             }
             
-            with open(self.checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+            # Só lido pelo script: sem indentação (metade do tamanho e do tempo)
+            self._write_json_atomic(self.checkpoint_file, checkpoint)
         except Exception as e:
             print(f"⚠️  Erro ao salvar checkpoint: {e}")
     
@@ -207,34 +939,76 @@ class PDFCompressor:
         except Exception as e:
             print(f"⚠️  Erro ao remover checkpoint: {e}")
     
+    def _open_events_log(self, resuming: bool):
+        """Abre o log de eventos JSONL (continua o anterior ao retomar)"""
+        try:
+            mode = "ab" if resuming else "wb"
+            self._jsonl = open(self.events_file_path, mode, buffering=1 << 16)
+            # Queda no meio de uma linha: fecha a linha antes de continuar acrescentando
+            if resuming and self._jsonl.tell() > 0:
+                with open(self.events_file_path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._jsonl.write(b"\n")
+        except Exception as e:
+            print(f"⚠️  Aviso: Não foi possível abrir o log de eventos: {e}")
+            self._jsonl = None
+    
+    def _append_event(self, file_info: dict):
+        """Grava uma linha no log de eventos (só o delta, sem reescrever o log inteiro)"""
+        if self._jsonl is None:
+            return
+        try:
+            self._jsonl.write(_json_dumps(file_info) + b"\n")
+        except Exception:
+            pass
+    
+    def _flush_events_log(self):
+        """Descarrega o buffer do log de eventos no disco"""
+        if self._jsonl is None:
+            return
+        try:
+            self._jsonl.flush()
+        except Exception:
+            pass
+    
+    def _close_events_log(self):
+        """Fecha o log de eventos"""
+        if self._jsonl is None:
+            return
+        try:
+            self._jsonl.close()
+        except Exception:
+            pass
+        self._jsonl = None
+    
+    def _add_to_history(self, file_info: dict):
+        """Adiciona ao histórico do log (descarta o mais antigo ao passar de 1000)"""
+        file_path = file_info.get("file") or file_info.get("original_path")
+        if not file_path or file_path in self._history_paths:
+            return
+        if len(self._history) == self._history.maxlen:
+            oldest = self._history[0]
+            self._history_paths.discard(oldest.get("file") or oldest.get("original_path"))
+        self._history.append(file_info)
+        self._history_paths.add(file_path)
+    
+    def _maybe_update_log(self, force: bool = False):
+        """Reescreve o log resumido só a cada N arquivos ou 5 segundos"""
+        self._files_since_log_flush += 1
+        now = time.monotonic()
+        if force or self._files_since_log_flush >= self.log_flush_interval or now - self._last_log_flush >= 5:
+            self._flush_events_log()
+            self._update_log_realtime()
+            self._files_since_log_flush = 0
+            self._last_log_flush = now
+    
     def _update_log_realtime(self):
         """Atualiza o arquivo de log em tempo real (resumo geral + últimos 1000 arquivos)"""
         duration = (datetime.now() - self.start_time).total_seconds() if self.start_time else 0
         
-        # Carrega histórico existente
-        processed_history = []
-        existing_files_set = set()  # OTIMIZAÇÃO: set para verificação O(1)
-        
-        if os.path.exists(self.log_file_path):
-            try:
-                with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                    existing_log = json.load(f)
-                    processed_history = existing_log.get("processed_files_history", [])
-                    # Cria set de arquivos existentes (MUITO mais rápido)
-                    existing_files_set = {item.get("file") or item.get("original_path") for item in processed_history}
-            except:
-                pass
-        
-        # Adiciona apenas novos arquivos ao histórico (verificação O(1) com set)
-        for file_info in self.stats["processed_files"]:
-            file_path = file_info.get("file") or file_info.get("original_path")
-            if file_path and file_path not in existing_files_set:
-                processed_history.append(file_info)
-                existing_files_set.add(file_path)
-        
-        # Mantém apenas os últimos 1000 (FIFO - First In First Out)
-        if len(processed_history) > 1000:
-            processed_history = processed_history[-1000:]
+        # Histórico vem da memória (últimos 1000) - não relê o log do disco
+        processed_history = list(self._history)
         
         # Calcula porcentagem de conclusão
         total_processed = len(self.processed_files_set)
@@ -278,34 +1052,42 @@ class PDFCompressor:
         }
         
         try:
-            with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                json.dump(log_data, f, indent=2, ensure_ascii=False)
+            self._write_json_atomic(self.log_file_path, log_data, indent=True)
         except Exception as e:
             # Não interrompe o processamento se o log falhar
             pass
     
     def _finalize_log(self, duration: float):
         """Finaliza o arquivo de log com status completo"""
-        # Carrega histórico existente (dos saves incrementais)
-        processed_history = []
-        if os.path.exists(self.log_file_path):
-            try:
-                with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                    existing_log = json.load(f)
-                    processed_history = existing_log.get("processed_files_history", [])
-            except:
-                pass
-        
-        # Adiciona arquivos que ainda não estão no histórico
-        existing_paths = {item.get("file") or item.get("original_path") for item in processed_history}
-        for file_info in self.stats["processed_files"]:
-            file_path = file_info.get("file") or file_info.get("original_path")
-            if file_path and file_path not in existing_paths:
-                processed_history.append(file_info)
-        
-        # Mantém últimos 1000 no histórico
-        if len(processed_history) > 1000:
-            processed_history = processed_history[-1000:]
+        self._close_events_log()
+        
+        # Lê o log de eventos uma única vez: últimos 1000 + top 20 compressões
+        processed_history = deque(maxlen=1000)
+        top_compressions = []
+        try:
+            with open(self.events_file_path, 'rb') as f:
+                for line_number, line in enumerate(f):
+                    try:
+                        file_info = _json_loads(line)
+                    except ValueError:
+                        continue  # Linha incompleta (ex: queda no meio da escrita)
+                    processed_history.append(file_info)
+                    if file_info.get("status") == "success":
+                        saved = file_info["original_size"] - file_info["compressed_size"]
+                        entry = (saved, line_number, file_info)
+                        if len(top_compressions) < 20:
+                            heapq.heappush(top_compressions, entry)
+                        elif saved > top_compressions[0][0]:
+                            heapq.heapreplace(top_compressions, entry)
+        except FileNotFoundError:
+            # Sem eventos (ex: nenhum PDF nesta execução) - usa a memória
+            processed_history.extend(self._history)
+            successes = [f for f in self.stats["processed_files"] if f["status"] == "success"]
+            top_compressions = [(f["original_size"] - f["compressed_size"], i, f) for i, f in enumerate(successes)]
+        except Exception:
+            pass
+        processed_history = list(processed_history)
+        top_compressions = [item[2] for item in sorted(top_compressions, key=lambda x: x[0], reverse=True)[:20]]
         
         # Calcula porcentagem de conclusão
         total_processed = len(self.processed_files_set)
@@ -344,8 +1126,7 @@ class PDFCompressor:
         
         try:
             # Salva log completo
-            with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                json.dump(log_data, f, indent=2, ensure_ascii=False)
+            self._write_json_atomic(self.log_file_path, log_data, indent=True)
             print(f"📝 Log final salvo em: {self.log_file_path}")
             
             # Cria um resumo separado para facilitar consulta rápida
@@ -354,7 +1135,7 @@ class PDFCompressor:
                 "execution_start": self.start_time.isoformat() if self.start_time else datetime.now().isoformat(),
                 "execution_end": datetime.now().isoformat(),
                 "duration_seconds": round(duration, 2),
-                "statistics": log_data["statistics"],
+                "statistics": log_data["summary"]["statistics"],
                 "error_breakdown_details": {
                     "already_optimized": self.stats.get("error_breakdown", {}).get("already_optimized", 0),
                     "minimal_gain": self.stats.get("error_breakdown", {}).get("minimal_gain", 0),
@@ -370,22 +1151,19 @@ class PDFCompressor:
                     "low_5_to_15": self.stats.get("compression_ranges", {}).get("low", 0),
                     "minimal_below_5": self.stats.get("compression_ranges", {}).get("minimal", 0)
                 },
-                "top_compressions": sorted(
-                    [f for f in self.stats["processed_files"] if f["status"] == "success"],
-                    key=lambda x: x["original_size"] - x["compressed_size"],
-                    reverse=True
-                )[:20]  # Top 20 melhores compressões
+                "top_compressions": top_compressions  # Top 20 melhores compressões
             }
-            with open(summary_path, 'w', encoding='utf-8') as f:
-                json.dump(summary_data, f, indent=2, ensure_ascii=False)
+            with open(summary_path, 'wb') as f:
+                f.write(_json_dumps(summary_data, indent=True))
             print(f"📊 Resumo salvo em: {summary_path}")
             
         except Exception as e:
             print(f"⚠️  Não foi possível salvar o log final: {e}")
 
     
-    def _find_all_files(self, root_path: str) -> tuple[List[Path], List[Path]]:
-        """Encontra todos os arquivos (PDFs e não-PDFs) recursivamente (otimizado para grandes volumes)"""
+    def _find_all_files(self, root_path: str) -> Tuple[List[str], List[str]]:
+        """Encontra todos os arquivos (PDFs e não-PDFs) recursivamente (otimizado para grandes volumes)
+        Retorna caminhos como str: Path() só é criado depois, para os PDFs que serão comprimidos"""
         self._update_status("🔍 Procurando arquivos PDF...")
         
         pdfs = []
@@ -402,60 +1180,87 @@ class PDFCompressor:
         
         compress_folder_name = self.config["compress_folder_name"]
         allowed_extensions = self.config.get("processing", {}).get("allowed_extensions", [".pdf", ".PDF"])
+        ext_tuple = tuple(allowed_extensions)  # str.endswith(tuple) compara em C
         
-        # Busca OTIMIZADA com os.walk (5-10x mais rápido que rglob)
+        # Busca em largura: cada pasta é uma tarefa de os.scandir em uma thread
+        # (a syscall libera o GIL - ganho grande em SMB/NFS com milhões de arquivos)
         print("   Escaneando diretórios (otimizado)...", end="", flush=True)
         count_pdfs = 0
         count_others = 0
+        last_report = 0
         
-        # os.walk é muito mais rápido para grandes volumes
-        for dirpath, dirnames, filenames in os.walk(root):
-            # Remove pasta compress da busca ANTES de entrar nela
-            dirnames[:] = [d for d in dirnames if d != compress_folder_name]
-            
-            # Processa todos os arquivos
-            for filename in filenames:
-                file_path = Path(dirpath) / filename
+        scan_workers = self.config.get("scan_workers", 16)
+        with ThreadPoolExecutor(max_workers=scan_workers) as executor:
+            pending = {executor.submit(self._scan_directory, str(root), compress_folder_name, ext_tuple)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_pdfs, dir_others, subdirs = future.result()
+                    pdfs.extend(dir_pdfs)
+                    other_files.extend(dir_others)
+                    count_pdfs += len(dir_pdfs)
+                    count_others += len(dir_others)
+                    for subdir in subdirs:
+                        pending.add(executor.submit(self._scan_directory, subdir, compress_folder_name, ext_tuple))
                 
-                if any(filename.endswith(ext) for ext in allowed_extensions):
-                    pdfs.append(file_path)
-                    count_pdfs += 1
-                else:
-                    other_files.append(file_path)
-                    count_others += 1
-                    
                 # Feedback a cada 1000 arquivos (reduz I/O)
-                if (count_pdfs + count_others) % 1000 == 0:
+                if (count_pdfs + count_others) // 1000 != last_report:
+                    last_report = (count_pdfs + count_others) // 1000
                     print(f"\r   Escaneando... {count_pdfs:,} PDFs, {count_others:,} outros", end="", flush=True)
         
         print(f"\r   ✅ Encontrados {count_pdfs:,} PDFs e {count_others:,} outros arquivos!                    ")
         
-        # Ordenação opcional (descomente se precisar)
-        # pdfs.sort()
+        # As threads terminam fora de ordem: ordena para os nomes de saída serem estáveis entre retomadas
+        pdfs.sort()
+        other_files.sort()
         return pdfs, other_files
     
     
-    def _copy_other_file(self, file_path: Path, root_path: str, compress_folder: Path) -> bool:
+    def _scan_directory(self, dir_path: str, compress_folder_name: str, ext_tuple: tuple) -> Tuple[List[str], List[str], List[str]]:
+        """Lista uma pasta com os.scandir (roda em thread): retorna PDFs, outros arquivos e subpastas"""
+        pdfs = []
+        other_files = []
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    # Tipo vem do próprio readdir, sem stat extra
+                    if entry.is_dir(follow_symlinks=False):
+                        # Não entra na pasta compress
+                        if entry.name != compress_folder_name:
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith(ext_tuple):
+                        pdfs.append(entry.path)
+                    else:
+                        other_files.append(entry.path)
+        except OSError as e:
+            print(f"\n   ⚠️  Erro ao ler pasta {dir_path}: {e}")
+        return pdfs, other_files, subdirs
+    
+    def _copy_other_file(self, file_path: str, root_path: str, compress_folder: Path) -> bool:
         """Copia arquivo não-PDF mantendo a estrutura de pastas"""
         try:
             # Calcula caminho relativo ao root
-            relative_path = file_path.relative_to(root_path)
+            relative_path = os.path.relpath(file_path, root_path)
             target_path = compress_folder / relative_path
             
             # Cria diretórios necessários
             target_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Copia arquivo preservando metadados
-            shutil.copy2(file_path, target_path)
+            # Copia o conteúdo (sendfile no Linux) e só depois os metadados, se configurado
+            shutil.copyfile(file_path, target_path)
+            if self.config.get("preserve_metadata", True):
+                shutil.copystat(file_path, target_path)
             return True
             
         except Exception as e:
-            print(f"❌ Erro ao copiar '{file_path.name}': {e}")
+            tqdm.write(f"❌ Erro ao copiar '{os.path.basename(file_path)}': {e}")
             return False
     
-    def _get_unique_filename(self, target_path: Path) -> Path:
-        """Gera nome único se arquivo já existe"""
-        if not target_path.exists():
+    def _get_unique_filename(self, target_path: Path, reserved: set = None) -> Path:
+        """Gera nome único se arquivo já existe (ou já foi reservado para outro PDF)"""
+        reserved = reserved if reserved is not None else set()
+        if not target_path.exists() and target_path not in reserved:
             return target_path
         
         counter = 1
@@ -467,232 +1272,10 @@ class PDFCompressor:
         while True:
             new_name = f"{stem}{suffix_pattern.format(counter=counter)}{extension}"
             new_path = parent / new_name
-            if not new_path.exists():
+            if not new_path.exists() and new_path not in reserved:
                 return new_path
             counter += 1
     
-    def _compress_pdf(self, input_path: Path, output_path: Path) -> Tuple[bool, str, int, int, str]:
-        """
-        Comprime um PDF individual
-        Retorna: (sucesso, mensagem, tamanho_original, tamanho_comprimido, categoria_erro)
-        """
-        try:
-            original_size = input_path.stat().st_size
-            
-            # Abre o PDF com pikepdf
-            with pikepdf.open(input_path) as pdf:
-                # Configurações de compressão
-                compress_settings = self.config["compression_settings"]
-                
-                # Remove objetos duplicados para reduzir tamanho
-                if compress_settings.get("remove_duplicates", True):
-                    try:
-                        pdf.remove_unreferenced_resources()
-                    except:
-                        pass
-                
-                # Processa imagens no PDF para reduzir tamanho (com qualidade alta)
-                if compress_settings.get("recompress_images", True):
-                    self._compress_images_in_pdf(pdf, compress_settings.get("image_quality", 95))
-                
-                # Salva com máxima compressão
-                # compress_streams: comprime todos os streams
-                # stream_decode_level.generalized: máxima descompressão antes de recomprimir
-                # object_stream_mode.generate: agrupa objetos em streams para melhor compressão
-                # linearize: otimiza estrutura do PDF (não pode usar com normalize_content)
-                pdf.save(
-                    output_path,
-                    compress_streams=True,
-                    stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
-                    object_stream_mode=pikepdf.ObjectStreamMode.generate,
-                    linearize=True,
-                    recompress_flate=True  # Recomprime streams deflate para máxima compressão
-                )
-            
-            compressed_size = output_path.stat().st_size
-            
-            # Calcula taxa de compressão
-            compression_ratio = ((original_size - compressed_size) / original_size) * 100 if original_size > 0 else 0
-            
-            # Verifica se realmente comprimiu
-            if compressed_size >= original_size:
-                # Copia o arquivo original ao invés de remover
-                shutil.copy2(input_path, output_path)
-                return False, f"PDF já otimizado - sem ganho de compressão", original_size, original_size, "already_optimized"
-            
-            # ACEITA QUALQUER GANHO DE COMPRESSÃO, mesmo que seja 0.1%
-            # Prioridade: qualidade + redução de tamanho (velocidade não importa)
-            return True, f"Comprimido com sucesso ({compression_ratio:.1f}% de redução)", original_size, compressed_size, None
-            
-        except pikepdf.PasswordError:
-            # Copia o arquivo original mesmo com erro
-            try:
-                shutil.copy2(input_path, output_path)
-            except:
-                pass
-            return False, "PDF protegido por senha - arquivo copiado", input_path.stat().st_size, input_path.stat().st_size, "password_protected"
-        except pikepdf.PdfError as e:
-            # Copia o arquivo original mesmo com erro
-            try:
-                shutil.copy2(input_path, output_path)
-            except:
-                pass
-            error_msg = str(e).lower()
-            if "damaged" in error_msg or "corrupt" in error_msg or "invalid" in error_msg:
-                return False, f"PDF corrompido - arquivo copiado", input_path.stat().st_size, input_path.stat().st_size, "corrupted"
-            return False, f"Erro no PDF - arquivo copiado: {str(e)[:100]}", input_path.stat().st_size, input_path.stat().st_size, "other_errors"
-        except PermissionError:
-            return False, "PDF em uso ou sem permissão - não copiado", 0, 0, "permission_denied"
-        except Exception as e:
-            # Copia o arquivo original mesmo com erro
-            try:
-                shutil.copy2(input_path, output_path)
-            except:
-                pass
-            return False, f"Erro desconhecido - arquivo copiado: {str(e)[:100]}", input_path.stat().st_size, input_path.stat().st_size, "other_errors"
-    
-    def _compress_images_in_pdf(self, pdf: pikepdf.Pdf, quality: int):
-        """Comprime imagens dentro do PDF usando técnicas avançadas"""
-        try:
-            # Itera sobre todos os objetos do PDF para encontrar imagens
-            for obj in list(pdf.objects):
-                try:
-                    if not isinstance(obj, pikepdf.Stream) or obj.get("/Subtype") != "/Image":
-                        continue
-                    
-                    # Pega o filtro da imagem
-                    filt = obj.get("/Filter")
-                    if isinstance(filt, pikepdf.Array) and len(filt) > 0:
-                        filt = filt[0]
-                    
-                    # Otimiza apenas imagens PNG/Flate (sem perdas) ou JPEG com alta qualidade
-                    if filt == pikepdf.Name.FlateDecode:
-                        # Imagem PNG - usa compressão zlib agressiva
-                        self._optimize_flate_image(pdf, obj, quality)
-                    elif filt == pikepdf.Name.DCTDecode:
-                        # Imagem JPEG - recomprime apenas se qualidade for menor que atual
-                        self._optimize_jpeg_image(obj, quality)
-                    
-                except Exception as e:
-                    # Se falhar em uma imagem, continua com as outras
-                    continue
-                    
-        except Exception:
-            # Se falhar no processamento de imagens, continua sem comprimir imagens
-            pass
-    
-    def _optimize_flate_image(self, pdf: pikepdf.Pdf, obj: pikepdf.Stream, quality: int):
-        """Otimiza imagens PNG/Flate usando compressão zlib (técnica da minimalpdfcompress)"""
-        try:
-            original_size = len(obj.read_raw_bytes())
-            if original_size == 0:
-                return
-            
-            # Extrai a imagem
-            pdfimage = pikepdf.PdfImage(obj)
-            pil_image = pdfimage.as_pil_image()
-            
-            # Verifica se tem transparência
-            has_transparency = 'A' in pil_image.mode
-            
-            if has_transparency:
-                # Separa RGB e Alpha para melhor compressão
-                if pil_image.mode != 'RGBA':
-                    pil_image = pil_image.convert('RGBA')
-                
-                rgb_image = Image.new("RGB", pil_image.size, (255, 255, 255))
-                rgb_image.paste(pil_image, mask=pil_image.split()[3])
-                alpha_image = pil_image.split()[3]
-                
-                # Comprime RGB e Alpha separadamente com zlib (máxima compressão)
-                compressed_rgb = zlib.compress(rgb_image.tobytes(), level=9)
-                compressed_alpha = zlib.compress(alpha_image.tobytes(), level=9)
-                total_new_size = len(compressed_rgb) + len(compressed_alpha)
-                
-                if total_new_size < original_size:
-                    # Limpa o stream e escreve novo conteúdo
-                    for key in list(obj.keys()):
-                        del obj[key]
-                    
-                    obj.write(compressed_rgb)
-                    obj.Type = pikepdf.Name.XObject
-                    obj.Subtype = pikepdf.Name.Image
-                    obj.Filter = pikepdf.Name.FlateDecode
-                    obj.Width = pil_image.width
-                    obj.Height = pil_image.height
-                    obj.ColorSpace = pikepdf.Name.DeviceRGB
-                    obj.BitsPerComponent = 8
-                    
-                    # Cria stream SMask para transparência
-                    smask_stream = pdf.make_stream(compressed_alpha)
-                    smask_stream.Type = pikepdf.Name.XObject
-                    smask_stream.Subtype = pikepdf.Name.Image
-                    smask_stream.Filter = pikepdf.Name.FlateDecode
-                    smask_stream.Width = pil_image.width
-                    smask_stream.Height = pil_image.height
-                    smask_stream.ColorSpace = pikepdf.Name.DeviceGray
-                    smask_stream.BitsPerComponent = 8
-                    obj.SMask = smask_stream
-            else:
-                # Sem transparência - comprime direto
-                if pil_image.mode != 'RGB':
-                    pil_image = pil_image.convert('RGB')
-                
-                compressed_rgb = zlib.compress(pil_image.tobytes(), level=9)
-                
-                if len(compressed_rgb) < original_size:
-                    for key in list(obj.keys()):
-                        del obj[key]
-                    
-                    obj.write(compressed_rgb)
-                    obj.Type = pikepdf.Name.XObject
-                    obj.Subtype = pikepdf.Name.Image
-                    obj.Filter = pikepdf.Name.FlateDecode
-                    obj.Width = pil_image.width
-                    obj.Height = pil_image.height
-                    obj.ColorSpace = pikepdf.Name.DeviceRGB
-                    obj.BitsPerComponent = 8
-                    if pikepdf.Name.SMask in obj:
-                        del obj[pikepdf.Name.SMask]
-        
-        except Exception:
-            pass
-    
-    def _optimize_jpeg_image(self, obj: pikepdf.Stream, quality: int):
-        """Otimiza imagens JPEG mantendo alta qualidade"""
-        try:
-            original_size = len(obj.read_raw_bytes())
-            if original_size == 0:
-                return
-            
-            # Extrai e recomprime JPEG
-            pdfimage = pikepdf.PdfImage(obj)
-            pil_image = pdfimage.as_pil_image()
-            
-            img_byte_arr = io.BytesIO()
-            
-            # Converte para RGB se necessário
-            if pil_image.mode == 'RGBA':
-                background = Image.new('RGB', pil_image.size, (255, 255, 255))
-                background.paste(pil_image, mask=pil_image.split()[3])
-                pil_image = background
-            elif pil_image.mode != 'RGB':
-                pil_image = pil_image.convert('RGB')
-            
-            # Salva com qualidade alta e otimização agressiva
-            pil_image.save(img_byte_arr, format='JPEG', quality=quality, optimize=True, progressive=True)
-            new_bytes = img_byte_arr.getvalue()
-            
-            # Só substitui se for menor
-            if len(new_bytes) < original_size:
-                obj.write(new_bytes)
-                obj.Filter = pikepdf.Name.DCTDecode
-                if '/DecodeParms' in obj:
-                    del obj['/DecodeParms']
-        
-        except Exception:
-            pass
-    
     def _create_compress_folder(self, root_path: str) -> Path:
         """Cria pasta compress no local configurado"""
         compress_output = self.config.get("compress_output_path", "same_as_root")
@@ -714,6 +1297,77 @@ class PDFCompressor:
             print(f"❌ ERRO ao criar pasta compress: {e}")
             raise
     
+    def _apply_result(self, file_info: dict):
+        """Soma um resultado às estatísticas (também usado ao reconstruir a partir do log de eventos)"""
+        stats = self.stats
+        original_size = file_info["original_size"]
+        compressed_size = file_info["compressed_size"]
+        error_category = file_info.get("error_category")
+        
+        # Atualiza estatísticas por categoria (Counters: sem .get() por chave)
+        if file_info["status"] == "success":
+            # Classifica por faixa de compressão
+            compression_ratio = ((original_size - compressed_size) / original_size) * 100 if original_size > 0 else 0
+            if compression_ratio >= 50:
+                range_name = "excellent"
+            elif compression_ratio >= 30:
+                range_name = "good"
+            elif compression_ratio >= 15:
+                range_name = "moderate"
+            elif compression_ratio >= 5:
+                range_name = "low"
+            else:
+                range_name = "minimal"
+            stats["compression_ranges"][range_name] += 1
+            stats["total_compressed"] += 1
+            stats["total_original_bytes"] += original_size
+            stats["total_final_bytes"] += compressed_size
+            stats["space_saved_bytes"] += (original_size - compressed_size)
+        else:
+            stats["total_errors"] += 1
+            stats["errors"].append(file_info)
+        
+        # Registra categoria de erro se houver
+        if error_category:
+            stats["error_breakdown"][error_category] += 1
+            stats["total_copied"] += 1
+        
+        stats["processed_files"].append(file_info)
+        self._add_to_history(file_info)
+        
+        # Adiciona ao set de processados
+        self.processed_files_set.add(_path_hash(file_info["original_path"]))
+    
+    def _record_result(self, pdf_path: Path, relative_path: Path, output_path: Path, result: Tuple[bool, str, int, int, str]):
+        """Registra o resultado de um PDF nas estatísticas (só erros reais aparecem na tela)"""
+        success, message, original_size, compressed_size, error_category = result
+        
+        file_info = {
+            "file": str(relative_path),
+            "original_path": str(pdf_path),
+            "compressed_path": str(output_path),
+            "original_size": original_size,
+            "compressed_size": compressed_size,
+            "compression_ratio": round(((original_size - compressed_size) / original_size) * 100, 2) if original_size > 0 else 0,
+            "timestamp": datetime.now().isoformat(),
+            "status": "success" if success else "error",
+            "error_category": error_category if error_category else None,
+            "message": message
+        }
+        
+        # Sucessos e "sem ganho" só vão para o log e o resumo; tqdm.write não quebra a barra
+        if not success and error_category not in ("already_optimized", "minimal_gain"):
+            if error_category == "password_protected":
+                tqdm.write(f"🔒 {relative_path}: {message}")
+            elif error_category == "corrupted":
+                tqdm.write(f"⚠️  {relative_path}: {message}")
+            else:
+                tqdm.write(f"❌ {relative_path}: {message}")
+        
+        self._apply_result(file_info)
+        # O log de eventos é o checkpoint incremental: uma linha por PDF, só acrescentada
+        self._append_event(file_info)
+    
     def process_all_pdfs(self):
         """Processa todos os PDFs encontrados"""
         self.start_time = datetime.now()
@@ -741,11 +1395,15 @@ class PDFCompressor:
         if not resuming:
             self.session_info['first_start'] = self.start_time.isoformat()
         
+        # Log de eventos por arquivo (append-only)
+        self._open_events_log(resuming)
+        
         # 4. Procurar arquivos (PDFs e outros)
         pdf_files, other_files = self._find_all_files(root_path)
         
-        # Filtrar PDFs já processados
-        pdfs_to_process = [pdf for pdf in pdf_files if str(pdf) not in self.processed_files_set]
+        # Filtrar PDFs já processados (Path só é criado para os que serão comprimidos)
+        processed, path_hash = self.processed_files_set, _path_hash
+        pdfs_to_process = [Path(pdf) for pdf in pdf_files if path_hash(pdf) not in processed]
         
         self.stats["total_found"] = len(pdf_files)
         already_processed = len(pdf_files) - len(pdfs_to_process)
@@ -765,81 +1423,70 @@ class PDFCompressor:
             # 5. Comprimir PDFs (apenas os não processados)
             self._update_status(f"🗜️  Comprimindo {len(pdfs_to_process)} PDFs...")
             
-            for idx, pdf_path in enumerate(pdfs_to_process, 1):
-                relative_path = pdf_path.relative_to(root_path)
-                print(f"\n[{idx}/{len(pdfs_to_process)}] Processando: {relative_path}")
-                
-                # Define caminho de saída (mantém nome original na pasta compress)
+            # Define caminhos de saída no processo principal (evita que dois workers usem o mesmo nome)
+            output_paths = []
+            reserved_paths = set()
+            for pdf_path in pdfs_to_process:
                 output_path = compress_folder / pdf_path.name
+                if self.config["processing"]["add_suffix_on_conflict"]:
+                    output_path = self._get_unique_filename(output_path, reserved_paths)
+                reserved_paths.add(output_path)
+                output_paths.append(output_path)
+            
+            # Compressão é CPU-bound (pikepdf/Pillow/zlib): um processo por núcleo contorna o GIL
+            cpu_count = os.cpu_count() or 1
+            workers = self.config.get("workers", 8)
+            workers = min(cpu_count, workers) if workers > 0 else cpu_count
+            compress_settings = self.config["compression_settings"]
+            print(f"⚙️  Workers: {workers} processos em paralelo")
+            
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Janela limitada de tarefas em voo: resultados saem na ordem em que terminam
+                # (um PDF lento não segura os outros) sem criar um Future por arquivo de uma vez
+                tasks = zip(pdfs_to_process, output_paths)
+                in_flight = {}
                 
-                # Verifica conflito de nome
-                if self.config["processing"]["add_suffix_on_conflict"] and output_path.exists():
-                    output_path = self._get_unique_filename(output_path)
-                
-                # Comprime o PDF
-                success, message, original_size, compressed_size, error_category = self._compress_pdf(pdf_path, output_path)
-                
-                # Atualiza estatísticas por categoria
-                if success:
-                    # Classifica por faixa de compressão
-                    compression_ratio = ((original_size - compressed_size) / original_size) * 100 if original_size > 0 else 0
-                    if compression_ratio >= 50:
-                        self.stats["compression_ranges"]["excellent"] += 1
-                    elif compression_ratio >= 30:
-                        self.stats["compression_ranges"]["good"] += 1
-                    elif compression_ratio >= 15:
-                        self.stats["compression_ranges"]["moderate"] += 1
-                    elif compression_ratio >= 5:
-                        self.stats["compression_ranges"]["low"] += 1
-                    else:
-                        self.stats["compression_ranges"]["minimal"] += 1
-                
-                # Registra categoria de erro se houver
-                if error_category:
-                    self.stats["error_breakdown"][error_category] = self.stats["error_breakdown"].get(error_category, 0) + 1
-                    self.stats["total_copied"] += 1
-                
-                file_info = {
-                    "file": str(relative_path),
-                    "original_path": str(pdf_path),
-                    "compressed_path": str(output_path),
-                    "original_size": original_size,
-                    "compressed_size": compressed_size,
-                    "compression_ratio": round(((original_size - compressed_size) / original_size) * 100, 2) if original_size > 0 else 0,
-                    "timestamp": datetime.now().isoformat(),
-                    "status": "success" if success else "error",
-                    "error_category": error_category if error_category else None,
-                    "message": message
-                }
-                
-                if success:
-                    self.stats["total_compressed"] += 1
-                    self.stats["total_original_bytes"] += original_size
-                    self.stats["total_final_bytes"] += compressed_size
-                    self.stats["space_saved_bytes"] += (original_size - compressed_size)
-                    print(f"   ✅ {message}")
-                    print(f"   📦 {self._format_size(original_size)} → {self._format_size(compressed_size)}")
-                else:
-                    if error_category in ["already_optimized", "minimal_gain"]:
-                        print(f"   ℹ️  {message}")
-                    elif error_category == "password_protected":
-                        print(f"   🔒 {message}")
-                    elif error_category == "corrupted":
-                        print(f"   ⚠️  {message}")
-                    else:
-                        print(f"   ❌ {message}")
-                    self.stats["total_errors"] += 1
-                    self.stats["errors"].append(file_info)
-                
-                self.stats["processed_files"].append(file_info)
-                
-                # Adiciona ao set de processados
-                self.processed_files_set.add(str(pdf_path))
+                def submit_next(count: int):
+                    for pdf_path, output_path in islice(tasks, count):
+                        future = executor.submit(_compress_pdf_worker, pdf_path, output_path, compress_settings)
+                        in_flight[future] = (pdf_path, output_path)
                 
-                # Atualiza log e checkpoint a cada 10 arquivos
-                if idx % 10 == 0 or idx == len(pdfs_to_process):
+                # Barra redesenhada no máximo a cada 0.5s (print por arquivo vira gargalo com muitos PDFs pequenos)
+                progress = tqdm(total=len(pdfs_to_process), desc="🗜️  Comprimindo", unit="pdf", mininterval=0.5)
+                try:
+                    submit_next(workers * 4)
+                    idx = 0
+                    while in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            pdf_path, output_path = in_flight.pop(future)
+                            submit_next(1)
+                            idx += 1
+                            
+                            try:
+                                result = future.result()
+                            except Exception as e:
+                                # Processo do worker morreu (ex: falha nativa no qpdf)
+                                result = (False, f"Erro no processo de compressão: {str(e)[:100]}", 0, 0, "other_errors")
+                            
+                            # Estatísticas, log e checkpoint ficam no processo principal
+                            self._record_result(pdf_path, pdf_path.relative_to(root_path), output_path, result)
+                            progress.update(1)
+                            
+                            # Log resumido a cada N arquivos (ou 5s); checkpoint a cada 10 arquivos
+                            self._maybe_update_log(force=idx == len(pdfs_to_process))
+                            if idx % 10 == 0 or idx == len(pdfs_to_process):
+                                self._flush_events_log()
+                                self._save_checkpoint()
+                except KeyboardInterrupt:
+                    # Cancela o que não começou e salva o que já terminou
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self._flush_events_log()
                     self._update_log_realtime()
                     self._save_checkpoint()
+                    raise
+                finally:
+                    progress.close()
         
         # 6. Copiar outros arquivos (não-PDFs)
         if len(other_files) > 0:
@@ -852,19 +1499,29 @@ class PDFCompressor:
             print(f"📅 Fase de cópia iniciada: {self.session_info['copy_phase_start']}")
             print(f"{'='*60}\n")
             
+            # Cópia é limitada por I/O: threads bastam (o GIL é liberado durante a cópia)
             copied_count = 0
-            for idx, file_path in enumerate(other_files, 1):
-                try:
-                    if self._copy_other_file(file_path, root_path, compress_folder):
-                        copied_count += 1
+            copy_workers = max(1, self.config.get("copy_workers", 16))
+            copy_executor = ThreadPoolExecutor(max_workers=copy_workers)
+            progress = tqdm(total=len(other_files), desc="📋 Copiando", unit="arq", mininterval=0.5)
+            try:
+                # Conta na ordem em que as cópias terminam (um arquivo grande não trava o progresso)
+                files_iter = iter(other_files)
+                in_flight = {copy_executor.submit(self._copy_other_file, file_path, root_path, compress_folder)
+                             for file_path in islice(files_iter, copy_workers * 4)}
+                while in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    copied_count += sum(1 for future in done if future.result())
+                    progress.update(len(done))
                     
-                    # Mostra progresso a cada 100 arquivos
-                    if idx % 100 == 0 or idx == len(other_files):
-                        print(f"📋 Copiados: {copied_count}/{idx}", end="\r", flush=True)
-                        
-                except KeyboardInterrupt:
-                    print(f"\n\n⚠️  Interrompido pelo usuário após {copied_count} arquivos copiados!")
-                    break
+                    for file_path in islice(files_iter, len(done)):
+                        in_flight.add(copy_executor.submit(self._copy_other_file, file_path, root_path, compress_folder))
+                
+            except KeyboardInterrupt:
+                print(f"\n\n⚠️  Interrompido pelo usuário após {copied_count} arquivos copiados!")
+            finally:
+                copy_executor.shutdown(wait=True, cancel_futures=True)
+                progress.close()
             
             print(f"\n✅ Copiados: {copied_count}/{len(other_files)} arquivos\n")
         